@@ -0,0 +1,49 @@
+"""
+Template definitions shared by the template scripts and the Flask app.
+"""
+import inspect
+
+# Template definitions matching the Mandrill account
+TEMPLATES = {
+    'template1': {
+        'name': 'template1',
+        'subject': 'Hello {{fname}}!',
+        'code': '''<h1>Hello {{fname}}!</h1>
+                <div mc:edit="welcome_message">
+                  <p>Welcome to {{company_name}}.</p>
+                </div>
+                <p>Your account: {{account_id}}</p>''',
+        'text': 'This is a simple greetings from template1.',
+        'labels': ['demo', 'hello'],
+        'mc_edit_region': 'welcome_message',
+        # Default template_content for the mc:edit region when sending
+        'default_content': (
+            {
+                'name': 'welcome_message',
+                'content': "<p>Thanks for joining <strong>{{company_name}}</strong>! We're excited to have you on board.</p>"
+            },
+        )
+    },
+    'template2': {
+        'name': 'template2',
+        'subject': 'Greetings {{fname}}!',
+        'code': '''<h1>Greetings {{fname}}!</h1>
+                <p>Hope your Account: {{account_id}} is all set in Company: {{company_name}}</p>
+                <div mc:edit="goodbye_message">
+                  <p>We will see you soon {{company_name}}.</p>
+                </div>''',
+        'text': 'This is a simple greetings from template2.',
+        'labels': ['demo', 'hello'],
+        'mc_edit_region': 'goodbye_message',
+        'default_content': (
+            {
+                'name': 'goodbye_message',
+                'content': "<p>We don't have much updates, but this email is for your account: {{account_id}} in company: {{company_name}}</p>"
+            },
+        )
+    }
+}
+
+# Strip the source-code indentation from the template bodies once, so it isn't uploaded with them
+for _template in TEMPLATES.values():
+    _template['code'] = inspect.cleandoc(_template['code'])
@@ -12,52 +12,245 @@ User Documentation:
 - Configure your API key and email addresses in the .env file or config.py.
 - Use the UI to select a script, fill in required fields, and send test emails.
 """
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash
 import mailchimp_transactional as MailchimpTransactional
 from mailchimp_transactional.api_client import ApiClientError
 from config import MANDRILL_API_KEY, DEFAULT_FROM_EMAIL, DEFAULT_FROM_NAME, DEFAULT_TO_EMAIL, DEFAULT_TO_NAME
-from email_with_template import TEMPLATES
+from _templates import TEMPLATES
+from mandrill_session import SESSION, configure_client
+from file_base64 import b64_file
 import requests
 import urllib.parse
-import json
-from functools import wraps
+import os
+import re
+import hashlib
+import logging
+import time
+import zlib
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
+from functools import lru_cache, wraps
+from itertools import chain
+
+# Use the SIMD-accelerated pybase64 for the generated readme attachment when it is installed
+try:
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
+
+# Use orjson for JSON when it is installed; both loads() accept bytes directly
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    from json import dumps as _json_dumps, loads as _json_loads
+
+# Debug output (full message payloads, API responses) is only formatted when LOG_LEVEL=DEBUG
+# Level names are accepted in any case; an unknown name falls back to INFO
+_LOG_LEVEL = logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper())
+logging.basicConfig(level=_LOG_LEVEL if isinstance(_LOG_LEVEL, int) else logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared API client, built once so every request reuses its pooled HTTP connections
+MAILCHIMP = configure_client(MailchimpTransactional.Client(MANDRILL_API_KEY))
+
+# Default recipient list shared by the prebuilt message skeletons below; never mutated
+_DEFAULT_TO = [{
+    'email': DEFAULT_TO_EMAIL,
+    'name': DEFAULT_TO_NAME,
+    'type': 'to'
+}]
+
+# Background pool for Mandrill send calls; handlers wait at most _SEND_TIMEOUT seconds for a result
+EXEC = ThreadPoolExecutor(max_workers=8, thread_name_prefix='mandrill')
+_SEND_TIMEOUT = 10
+
+
+def _do_send(message):
+    """
+    Send a message through the shared client. Runs on the EXEC pool.
+    """
+    return MAILCHIMP.messages.send({"message": message})
+
+
+def _do_send_template(params):
+    """
+    Send a template-based message through the shared client. Runs on the EXEC pool.
+    """
+    return MAILCHIMP.messages.send_template(params)
+
+
+# Recent successful sends, keyed by a hash of the message: {key: (sent_at, result)}
+_SEND_CACHE = {}
+_SEND_CACHE_TTL = 10.0
+_SENT_STATUSES = frozenset({'sent', 'queued', 'scheduled'})
+
+
+def _json_bytes(obj):
+    """
+    Serialize obj to compact JSON bytes.
+    """
+    data = _json_dumps(obj)
+    if isinstance(data, str):  # stdlib json fallback returns str
+        data = data.encode('utf-8')
+    return data
+
+
+def _message_key(message):
+    """
+    Return a short BLAKE2b digest identifying the exact message payload.
+    """
+    return hashlib.blake2b(_json_bytes(message), digest_size=16).hexdigest()
+
+
+def _send_deduplicated(message):
+    """
+    Send a message on the EXEC pool unless an identical message succeeded in the last
+    _SEND_CACHE_TTL seconds, in which case that send's result is returned without calling Mandrill.
+    Guards against duplicate sends when the same demo form is submitted repeatedly.
+    """
+    key = _message_key(message)
+    now = time.monotonic()
+    cached = _SEND_CACHE.get(key)
+    if cached is not None and now - cached[0] < _SEND_CACHE_TTL:
+        logger.debug('Identical message sent %.1fs ago; reusing its result', now - cached[0])
+        return cached[1]
+    result = EXEC.submit(_do_send, message).result(timeout=_SEND_TIMEOUT)
+    if isinstance(result, list) and result and all(r.get('status') in _SENT_STATUSES for r in result):
+        # Drop expired entries so the cache only holds the last few seconds of sends
+        for k, (sent_at, _) in list(_SEND_CACHE.items()):
+            if now - sent_at >= _SEND_CACHE_TTL:
+                _SEND_CACHE.pop(k, None)
+        _SEND_CACHE[key] = (now, result)
+    return result
+
+
+# SMS API endpoint (note: uses API version 1.1, not 1.0)
+SMS_API_ENDPOINT = 'https://mandrillapp.com/api/1.1/messages/send-sms'
+
+# SMS defaults from the environment, read once at import rather than on every request
+_SMS_TO_PHONE = os.getenv('SMS_TO_PHONE', '+1234567890')
+_SMS_FROM_PHONE = os.getenv('SMS_FROM_PHONE', '+0987654321')
+_SMS_MESSAGE = os.getenv('SMS_MESSAGE', 'Hello from Mandrill SMS!')
+_SMS_CONSENT_TYPE = os.getenv('SMS_CONSENT_TYPE', 'onetime')
+_SMS_TRACK_CLICKS = os.getenv('SMS_TRACK_CLICKS', 'false').lower() == 'true'
+
+# Recipient numbers must be E.164: '+', a non-zero country code digit, 7 to 15 digits in all
+_E164 = re.compile(r'\+[1-9]\d{6,14}')
+
+# Request headers for the send-sms call, built once
+_SMS_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _do_send_sms(payload):
+    """
+    POST an SMS payload through the shared session. Runs on the EXEC or SMS_BATCH_EXEC pool.
+    The SDK has no send_sms method, so this calls the REST API directly.
+    """
+    return SESSION.post(
+        SMS_API_ENDPOINT,
+        data=_json_dumps(payload),
+        headers=_SMS_HEADERS,
+        timeout=30
+    )
+
+
+def _sms_payload(to_phone, message_text):
+    """
+    Build the send-sms request body for one recipient, using the SMS defaults for everything else.
+    """
+    return {
+        'key': MANDRILL_API_KEY,
+        'message': {
+            'sms': {
+                'text': message_text,
+                'to': to_phone,
+                'from': _SMS_FROM_PHONE,
+                'consent': _SMS_CONSENT_TYPE,
+                'track_clicks': _SMS_TRACK_CLICKS
+            }
+        }
+    }
+
+
+# Attachment paths, resolved once at import
+HERE = os.path.dirname(os.path.abspath(__file__))
+PDF_PATH = os.path.join(HERE, 'sample.pdf')
+LOGO_PATH = os.path.join(HERE, 'static', 'images', 'logo.png')
+
+
+@lru_cache(maxsize=32)
+def _b64_attachment(path, mtime_ns, size, mime_type, name):
+    """
+    Build the attachment dict for a file around its cached base64 contents.
+    The dict is shared between requests, so treat it as read-only.
+    """
+    return {'type': mime_type, 'name': name, 'content': b64_file(path, mtime_ns, size)}
+
+
+def _file_attachment(path, mime_type, name):
+    """
+    Return the prebuilt attachment dict for path, or None if the file does not exist.
+    A single os.stat() both checks existence and supplies the cache key.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return _b64_attachment(path, st.st_mtime_ns, st.st_size, mime_type, name)
+
+
+@lru_cache(maxsize=1)
+def _readme_b64(generated_at):
+    """
+    Return the base64 readme.txt attachment stamped with generated_at.
+    Sends within the same second reuse the cached encoding.
+    """
+    text_content = 'This is a demo text file created by the Mandrill Use Case File.\n\nGenerated at: ' + generated_at
+    return _b64.b64encode(text_content.encode('utf-8')).decode('ascii')
+
+
+# Template names known to Mandrill, cached as (fetched_at, names) for _TEMPLATE_TTL seconds
+_TEMPLATE_NAME_CACHE = None
+_TEMPLATE_TTL = 60.0
 
 
 def template_exists(template_name):
     """
     Check if a template exists in Mandrill.
     Uses MANDRILL_API_KEY from config.py for consistency.
+    The template list is cached for _TEMPLATE_TTL seconds so repeated sends skip the API round-trip.
     """
+    global _TEMPLATE_NAME_CACHE
+    now = time.monotonic()
+    if _TEMPLATE_NAME_CACHE is not None and now - _TEMPLATE_NAME_CACHE[0] < _TEMPLATE_TTL:
+        return template_name in _TEMPLATE_NAME_CACHE[1]
     try:
-        client = MailchimpTransactional.Client(MANDRILL_API_KEY)
+        client = MAILCHIMP
         # Call without the label parameter for simpler request
         templates = client.templates.list()
         
-        # Debug: print what we're getting back
-        print(f"DEBUG templates type: {type(templates)}")
+        # Debug: log what we're getting back
+        logger.debug("templates type: %s", type(templates))
         if templates:
-            print(f"DEBUG first item type: {type(templates[0]) if len(templates) > 0 else 'empty'}")
+            logger.debug("first item type: %s", type(templates[0]))
         
-        # Handle case where API returns bytes
-        if isinstance(templates, bytes):
-            templates = json.loads(templates.decode('utf-8'))
-        elif isinstance(templates, str):
-            templates = json.loads(templates)
+        # Handle case where API returns raw bytes/str
+        if isinstance(templates, (bytes, str)):
+            templates = _json_loads(templates)
         
-        # Now iterate
+        # Build the name set once per fetch; lookups against the cache are then O(1)
+        names = frozenset()
         if isinstance(templates, list):
-            for t in templates:
-                # Handle if individual items are bytes/str
-                if isinstance(t, (bytes, str)):
-                    t = json.loads(t if isinstance(t, str) else t.decode('utf-8'))
-                if isinstance(t, dict) and t.get('name') == template_name:
-                    return True
-        return False
+            # Handle if individual items are bytes/str
+            items = (_json_loads(t) if isinstance(t, (bytes, str)) else t for t in templates)
+            names = frozenset(t['name'] for t in items if isinstance(t, dict) and 'name' in t)
+        _TEMPLATE_NAME_CACHE = (now, names)
+        return template_name in names
     except ApiClientError as e:
-        print(f"API Error checking template: {e}")
+        logger.warning("API Error checking template: %s", e)
         return False
     except Exception as e:
-        print(f"Error checking template existence: {e}")
+        logger.warning("Error checking template existence: %s", e)
         return False
 
 app = Flask(__name__, 
@@ -65,10 +258,43 @@ app = Flask(__name__,
     static_url_path='/static',
     template_folder='templates')
 
+def _load_or_create_secret(path):
+    """
+    Return the secret key stored at path, creating it with 32 random bytes on first use.
+    Keeps session cookies valid across restarts, and identical across workers, when FLASK_SECRET_KEY is not set.
+    Falls back to an in-memory key if the file can't be read or written (e.g. a read-only deploy).
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Cannot read secret key file %s (%s); using a key that lasts until restart", path, e)
+        return os.urandom(32)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(os.urandom(32))
+            # link() refuses to overwrite, so if another worker got there first its key wins
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        logger.warning("Cannot persist secret key to %s (%s); using a key that lasts until restart", path, e)
+        return os.urandom(32)
+
 # Set a secret key for session and flash
-# In production, use a secure random key from environment variables
-import os
-app.secret_key = os.getenv('FLASK_SECRET_KEY', os.urandom(24).hex())
+# In production, use a secure random key from environment variables;
+# otherwise a key is generated once and persisted in the instance folder
+app.secret_key = os.getenv('FLASK_SECRET_KEY') or _load_or_create_secret(os.path.join(app.instance_path, 'secret_key'))
 
 @app.before_request
 def clear_session():
@@ -81,6 +307,41 @@ def clear_session():
 def index():
     return render_template('index.html')
 
+# Merge-tag bodies are module constants, so every request references the same str objects
+_MERGE_HTML = '''
+    <h1>Welcome {{fname}}!</h1>
+    <p>Hi {{fname}} {{lname}},</p>
+    <p>Thanks for joining the {{company_name}}! Your account is now active.</p>
+    <p>Your membership level: {{membership_level}}</p>
+    <p>Best regards,<br>The {{company_name}} Team</p>
+'''
+
+_MERGE_TEXT = '''
+    Welcome {{fname}}!
+    
+    Hi {{fname}} {{lname}},
+    
+    Thanks for joining the {{company_name}}! Your account is now active.
+    Your membership level: {{membership_level}}
+    
+    Best regards,
+    The {{company_name}} Team
+'''
+
+# Static parts of the merge-tags message, built once at import
+_MERGE_TAGS_MSG_BASE = {
+    'html': _MERGE_HTML,
+    'text': _MERGE_TEXT,
+    'subject': 'Welcome to {{company_name}}, {{fname}}!',
+    'from_email': DEFAULT_FROM_EMAIL,
+    'from_name': DEFAULT_FROM_NAME,
+    'to': _DEFAULT_TO,
+    'headers': {
+        'Reply-To': DEFAULT_FROM_EMAIL
+    },
+    'merge_language': 'handlebars'
+}
+
 def send_email_with_merge_tags():
     """
     Send a personalized welcome email using Mailchimp Transactional API with merge tags.
@@ -93,39 +354,9 @@ def send_email_with_merge_tags():
     - The function returns a status message for each recipient or an error message if the API call fails.
     """
     try:
-        # Initialize the Mailchimp Transactional API client
-        mailchimp = MailchimpTransactional.Client(MANDRILL_API_KEY)
-        # Construct the message payload with merge tags for personalization
+        # Only the form-driven merge vars change per request; the rest comes from the prebuilt skeleton
         message = {
-            'html': '''
-                <h1>Welcome {{fname}}!</h1>
-                <p>Hi {{fname}} {{lname}},</p>
-                <p>Thanks for joining the {{company_name}}! Your account is now active.</p>
-                <p>Your membership level: {{membership_level}}</p>
-                <p>Best regards,<br>The {{company_name}} Team</p>
-            ''',
-            'text': '''
-                Welcome {{fname}}!
-                
-                Hi {{fname}} {{lname}},
-                
-                Thanks for joining the {{company_name}}! Your account is now active.
-                Your membership level: {{membership_level}}
-                
-                Best regards,
-                The {{company_name}} Team
-            ''',
-            'subject': 'Welcome to {{company_name}}, {{fname}}!',
-            'from_email': DEFAULT_FROM_EMAIL,
-            'from_name': DEFAULT_FROM_NAME,
-            'to': [{
-                'email': DEFAULT_TO_EMAIL,
-                'name': DEFAULT_TO_NAME,
-                'type': 'to'
-            }],
-            'headers': {
-                'Reply-To': DEFAULT_FROM_EMAIL
-            },
+            **_MERGE_TAGS_MSG_BASE,
             'global_merge_vars': [
                 {'name': 'company_name', 'content': request.form.get('companyName', 'Intuit Developer Program')},
                 {'name': 'membership_level', 'content': request.form.get('membershipLevel', 'Premium')},
@@ -138,16 +369,14 @@ def send_email_with_merge_tags():
                         {'name': 'lname', 'content': request.form.get('lastName', 'Smith')}
                     ]
                 }
-            ],
-            'merge_language': 'handlebars'
+            ]
         }
         # Send the email using the Mailchimp API
-        result = mailchimp.messages.send({"message": message})
-        print('Email sent successfully:', message)
-        print('Full result:', result)
+        result = _send_deduplicated(message)
+        logger.debug('Email sent successfully: %s', message)
+        logger.debug('Full result: %s', result)
         if isinstance(result, list):
-            status_lines = [f"send_email_with_merge_tags to : {recipient['email']}: {recipient['status']}" for recipient in result]
-            return '<br>'.join(status_lines)
+            return '<br>'.join(f"send_email_with_merge_tags to : {recipient['email']}: {recipient['status']}" for recipient in result)
         else:
             return f"Unexpected result structure: {result}"
     except ApiClientError as error:
@@ -168,27 +397,14 @@ def send_email_with_attachments():
     - The email will be sent to the default recipient as configured in config.py.
     - A status message will be displayed for each recipient, or an error if the send fails.
     """
-    import base64
-    import os
     try:
-        mailchimp = MailchimpTransactional.Client(MANDRILL_API_KEY)
-        # Read sample.pdf as base64 if it exists
-        pdf_path = os.path.join(os.path.dirname(__file__), 'sample.pdf')
-        print(pdf_path + " pdf_path")
-        pdf_content = ''
-        if os.path.exists(pdf_path):
-            with open(pdf_path, 'rb') as f:
-                pdf_content = base64.b64encode(f.read()).decode('utf-8')
+        # Attach sample.pdf if it exists
+        pdf_attachment = _file_attachment(PDF_PATH, 'application/pdf', 'sample.pdf')
         # Create a text file attachment as base64
-        text_content = 'This is a demo text file created by the Mandrill Use Case File.\n\nGenerated at: ' + __import__('datetime').datetime.utcnow().isoformat()
-        text_base64 = base64.b64encode(text_content.encode('utf-8')).decode('utf-8')
+        text_base64 = _readme_b64(datetime.now(timezone.utc).isoformat(timespec='seconds'))
         attachments = []
-        if pdf_content:
-            attachments.append({
-                'type': 'application/pdf',
-                'name': 'sample.pdf',
-                'content': pdf_content
-            })
+        if pdf_attachment:
+            attachments.append(pdf_attachment)
         attachments.append({
             'type': 'text/plain',
             'name': 'readme.txt',
@@ -208,12 +424,11 @@ def send_email_with_attachments():
             'attachments': attachments,
             'tags': ['attachments', 'outbound-documents']
         }
-        result = mailchimp.messages.send({"message": message})
-        print('Email sent successfully:', message)
-        print('Full result:', result)
+        result = EXEC.submit(_do_send, message).result(timeout=_SEND_TIMEOUT)
+        logger.debug('Email sent successfully: %s', message)
+        logger.debug('Full result: %s', result)
         if isinstance(result, list):
-            status_lines = [f"{r['email']}: {r['status']}" for r in result]
-            return '<br>'.join(status_lines)
+            return '<br>'.join(f"{r['email']}: {r['status']}" for r in result)
         else:
             return f"Unexpected result structure: {result}"
     except ApiClientError as error:
@@ -239,28 +454,44 @@ def testEmailbasedOnScriptID():
     if request.method == 'POST':
         form_data = request.form
         script_name = form_data['Script_name']
-        print("In testEmailbasedOnScriptID........" +script_name)
+        logger.debug("In testEmailbasedOnScriptID: %s", script_name)
 
         script_run_status = ''
-        if script_name == 'single':
-            script_run_status = send_single_email()
-        elif script_name == 'mergeTags':
-            script_run_status = send_email_with_merge_tags()
-        elif script_name == 'attachments':
-            script_run_status = send_email_with_attachments()
-        elif script_name == 'templates':
-            script_run_status = send_email_with_template()
-        elif script_name == 'allInOne':
-            script_run_status = send_bulk_email()
-        elif script_name == 'sms':
-            script_run_status = send_sms_message()
-        else:
-            flash('Invalid script selected. Please try again.', 'error')
-            return redirect(url_for('index'))
+        try:
+            if script_name == 'single':
+                script_run_status = send_single_email()
+            elif script_name == 'mergeTags':
+                script_run_status = send_email_with_merge_tags()
+            elif script_name == 'attachments':
+                script_run_status = send_email_with_attachments()
+            elif script_name == 'templates':
+                script_run_status = send_email_with_template()
+            elif script_name == 'allInOne':
+                script_run_status = send_bulk_email()
+            elif script_name == 'sms':
+                script_run_status = send_sms_message()
+            else:
+                flash('Invalid script selected. Please try again.', 'error')
+                return redirect(url_for('index'))
+        except FutureTimeoutError:
+            # The send keeps running on the background pool; don't hold the worker any longer
+            script_run_status = f"Message queued: Mandrill did not respond within {_SEND_TIMEOUT} seconds."
         return render_template('index.html', script_run_status=script_run_status)
     else:
         return render_template('index.html')
        
+# Static parts of the single-recipient message, built once at import
+_SINGLE_MSG_BASE = {
+    'html': '<p>Hello HTML world! from Mailchimp transactional API Demo</p>',
+    'text': 'Hello plain world! from Mailchimp transactional API Demo',
+    'subject': 'Hello world',
+    'from_email': DEFAULT_FROM_EMAIL,
+    'from_name': DEFAULT_FROM_NAME,
+    'headers': {
+        'Reply-To': DEFAULT_FROM_EMAIL
+    }
+}
+
 def send_single_email():
     """
     Send a simple transactional email using Mailchimp Transactional API.
@@ -276,25 +507,10 @@ def send_single_email():
     - The result will display the status, recipient, and message ID.
     """
     try:
-        mailchimp = MailchimpTransactional.Client(MANDRILL_API_KEY)
-        message = {
-            'html': '<p>Hello HTML world! from Mailchimp transactional API Demo</p>',
-            'text': 'Hello plain world! from Mailchimp transactional API Demo',
-            'subject': 'Hello world',
-            'from_email': DEFAULT_FROM_EMAIL,
-            'from_name': DEFAULT_FROM_NAME,
-            'to': [{
-                'email': DEFAULT_TO_EMAIL,
-                'name': DEFAULT_TO_NAME,
-                'type': 'to'
-            }],
-            'headers': {
-                'Reply-To': DEFAULT_FROM_EMAIL
-            }
-        }
-        result = mailchimp.messages.send({"message": message})
-        print('Email sent successfully:', message)
-        print('Full result:', result)
+        message = {**_SINGLE_MSG_BASE, 'to': _DEFAULT_TO}
+        result = _send_deduplicated(message)
+        logger.debug('Email sent successfully: %s', message)
+        logger.debug('Full result: %s', result)
         if result and len(result) > 0:
             status_msg = f"Status: {result[0]['status']}<br>Email to: {result[0]['email']}<br>Message ID: {result[0]['_id']}"
         else:
@@ -303,37 +519,82 @@ def send_single_email():
     except ApiClientError as error:
         return f"Mailchimp error: {error.__class__.__name__} - {error.text}"
 
-def send_bulk_email():
+# Body of the bulk/kitchen-sink message, shared by every request
+_BULK_HTML = '''
+    <h1>Hello {{fname}}!</h1>
+    <p>This email demonstrates multiple Transactional API features.</p>
+    <p>Company: {{company_name}}</p>
+    <p>Account: {{account_id}}</p>
+    <div style="width: 50px; height: 50px; background: #007bff; border: 2px solid #0056b3; display: inline-block;"></div>
+'''
+
+# Static parts of the bulk/kitchen-sink message, built once at import
+_BULK_MSG_BASE = {
+    'html': _BULK_HTML,
+    'text': 'Hello {{fname}}!\n\nThis email demonstrates multiple Transactional API features.\nCompany: {{company_name}}\nAccount: {{account_id}}',
+    'subject': 'Hello {{fname}} - Mandrill Features Demo',
+    'from_email': DEFAULT_FROM_EMAIL,
+    'from_name': DEFAULT_FROM_NAME,
+    # cc and bcc can be added as needed
+    'headers': {
+        'Reply-To': DEFAULT_FROM_EMAIL,
+        'X-Custom-Header': 'Mandrill-Demo'
+    },
+    'global_merge_vars': (
+        {'name': 'company_name', 'content': 'Intuit Developer Program'},
+    ),
+    'merge_language': 'handlebars',
+    'track_opens': True,
+    'track_clicks': True,
+    'auto_text': True,
+    'auto_html': False,
+    'inline_css': True,
+    'tags': ['demo', 'kitchen-sink', 'features'],
+    'metadata': {
+        'campaign': 'mandrill-demo',
+        'version': '1.0'
+    },
+    'important': True,
+    'view_content_link': True,
+    'preserve_recipients': False,
+    'async': False
+}
+
+# Recipients used when send_bulk_email() is called without a list
+_DEFAULT_BULK_RECIPIENTS = [
+    {'email': DEFAULT_TO_EMAIL, 'name': DEFAULT_TO_NAME, 'vars': {'fname': 'John', 'account_id': 'ACC-001'}}
+]
+
+# Maximum recipients per messages.send call; longer lists are split into pages sent in parallel on EXEC
+_BULK_PAGE_SIZE = 1000
+
+def send_bulk_email(recipients=None):
     """
     Send a bulk/kitchen-sink email demonstrating multiple Transactional API features.
 
     Technical Documentation:
     - Prepares attachments (PDF and text file) and embeds an image if available.
     - Constructs a message with merge tags, attachments, images, and various tracking options.
-    - Sends the email to the default recipient and returns a status message for each recipient.
+    - Sends one message to all recipients; Mandrill fans it out server-side, with per-recipient merge_vars.
+    - Recipient lists longer than _BULK_PAGE_SIZE are split into pages that are sent concurrently.
+    - Returns a status message for each recipient.
+
+    Args:
+        recipients (list): Dicts with 'email', optional 'name' and a 'vars' dict of merge values.
+            Defaults to the configured default recipient.
 
     User Documentation:
     - Use this function to send a feature-rich email with attachments and embedded image.
     - The email demonstrates advanced Mandrill/Mailchimp Transactional API features.
     - The result will display the status for each recipient or an error if the send fails.
     """
-    import base64
-    import os
     try:
-        mailchimp = MailchimpTransactional.Client(MANDRILL_API_KEY)
         # Prepare attachments (reuse PDF and text file logic)
         attachments = []
-        pdf_path = os.path.join(os.path.dirname(__file__), 'sample.pdf')
-        if os.path.exists(pdf_path):
-            with open(pdf_path, 'rb') as f:
-                pdf_content = base64.b64encode(f.read()).decode('utf-8')
-            attachments.append({
-                'type': 'application/pdf',
-                'name': 'sample.pdf',
-                'content': pdf_content
-            })
-        text_content = 'This is a demo text file created by the Mandrill Use Case File.\n\nGenerated at: ' + __import__('datetime').datetime.utcnow().isoformat()
-        text_base64 = base64.b64encode(text_content.encode('utf-8')).decode('utf-8')
+        pdf_attachment = _file_attachment(PDF_PATH, 'application/pdf', 'sample.pdf')
+        if pdf_attachment:
+            attachments.append(pdf_attachment)
+        text_base64 = _readme_b64(datetime.now(timezone.utc).isoformat(timespec='seconds'))
         attachments.append({
             'type': 'text/plain',
             'name': 'readme.txt',
@@ -341,76 +602,62 @@ def send_bulk_email():
         })
         # Prepare images (example: embed a logo if present)
         images = []
-        logo_path = os.path.join(os.path.dirname(__file__), 'static', 'images', 'logo.png')
-        if os.path.exists(logo_path):
-            with open(logo_path, 'rb') as f:
-                logo_content = base64.b64encode(f.read()).decode('utf-8')
-            images.append({
-                'type': 'image/png',
-                'name': 'logo.png',
-                'content': logo_content
-            })
-        message = {
-            'html': '''
-                <h1>Hello {{fname}}!</h1>
-                <p>This email demonstrates multiple Transactional API features.</p>
-                <p>Company: {{company_name}}</p>
-                <p>Account: {{account_id}}</p>
-                <div style="width: 50px; height: 50px; background: #007bff; border: 2px solid #0056b3; display: inline-block;"></div>
-            ''',
-            'text': 'Hello {{fname}}!\n\nThis email demonstrates multiple Transactional API features.\nCompany: {{company_name}}\nAccount: {{account_id}}',
-            'subject': 'Hello {{fname}} - Mandrill Features Demo',
-            'from_email': DEFAULT_FROM_EMAIL,
-            'from_name': DEFAULT_FROM_NAME,
-            'to': [{
-                'email': DEFAULT_TO_EMAIL,
-                'name': DEFAULT_TO_NAME,
-                'type': 'to'
-            }],
-            # cc and bcc can be added as needed
-            'headers': {
-                'Reply-To': DEFAULT_FROM_EMAIL,
-                'X-Custom-Header': 'Mandrill-Demo'
-            },
-            'global_merge_vars': [
-                {'name': 'company_name', 'content': 'Intuit Developer Program'}
-            ],
-            'merge_vars': [
-                {
-                    'rcpt': DEFAULT_TO_EMAIL,
-                    'vars': [
-                        {'name': 'fname', 'content': 'John'},
-                        {'name': 'account_id', 'content': 'ACC-001'}
-                    ]
-                }
-            ],
-            'merge_language': 'handlebars',
-            'attachments': attachments,
-            'images': images,
-            'track_opens': True,
-            'track_clicks': True,
-            'auto_text': True,
-            'auto_html': False,
-            'inline_css': True,
-            'tags': ['demo', 'kitchen-sink', 'features'],
-            'metadata': {
-                'campaign': 'mandrill-demo',
-                'version': '1.0'
-            },
-            'important': True,
-            'view_content_link': True,
-            'preserve_recipients': False,
-            'async': False
-        }
-        result = mailchimp.messages.send({"message": message})
-        if isinstance(result, list):
-            status_lines = [f"{r['email']}: {r['status']}" for r in result]
-            return '<br>'.join(status_lines)
-        else:
-            return f"Unexpected result structure: {result}"
+        logo_image = _file_attachment(LOGO_PATH, 'image/png', 'logo.png')
+        if logo_image:
+            images.append(logo_image)
+        if recipients is None:
+            recipients = _DEFAULT_BULK_RECIPIENTS
+        if not recipients:
+            return "No recipients to send to."
+        futures = []
+        for start in range(0, len(recipients), _BULK_PAGE_SIZE):
+            page = recipients[start:start + _BULK_PAGE_SIZE]
+            message = {
+                **_BULK_MSG_BASE,
+                'to': [{'email': r['email'], 'name': r.get('name', ''), 'type': 'to'} for r in page],
+                'merge_vars': [
+                    {'rcpt': r['email'], 'vars': [{'name': k, 'content': v} for k, v in r.get('vars', {}).items()]}
+                    for r in page
+                ],
+                'attachments': attachments,
+                'images': images
+            }
+            futures.append(EXEC.submit(_do_send, message))
+        # One deadline for all pages rather than _SEND_TIMEOUT per page
+        _, not_done = wait(futures, timeout=_SEND_TIMEOUT)
+        if not_done:
+            raise FutureTimeoutError()
+        result = []
+        for future in futures:
+            page_result = future.result()
+            if not isinstance(page_result, list):
+                return f"Unexpected result structure: {page_result}"
+            result.extend(page_result)
+        return '<br>'.join(f"{r['email']}: {r['status']}" for r in result)
     except ApiClientError as error:
         return f"Mailchimp error: {error.__class__.__name__} - {error.text}"
 
+# Merge vars shared by every template send, built once at import
+_TEMPLATE_GLOBAL_VARS = (
+    {'name': 'company_name', 'content': 'Intuit Developer Program'},
+)
+
+# mc:edit region content for each template, built once at import
+_TEMPLATE_CONTENT = {
+    'template1': (
+        {
+            'name': 'welcome_message',
+            'content': "<hr><p>Thanks for joining <strong>{{company_name}}</strong>! We're excited to have you on board.</p><hr>This email is generated for pre-designed template, generated for template1<hr>"
+        },
+    ),
+    'template2': (
+        {
+            'name': 'goodbye_message',
+            'content': "<hr><p>We don't have much updates, but this email is for your account: {{account_id}} in company: {{company_name}}</p><hr>"
+        },
+    )
+}
+
 def send_email_with_template():
     """
     Send an email using a Mailchimp Transactional template, creating the template if needed.
@@ -426,9 +673,8 @@ def send_email_with_template():
     - The result will display the status for each recipient or an error if the send fails.
     """
     try:
-        mailchimp = MailchimpTransactional.Client(MANDRILL_API_KEY)
         template_name = request.form['template_name']
-        print("Selected template::::::: " + template_name)
+        logger.debug("Selected template: %s", template_name)
         
         # Ensure the template exists, create if not available
         createTemplate(template_name)
@@ -446,9 +692,7 @@ def send_email_with_template():
                 'name': DEFAULT_TO_NAME,
                 'type': 'to'
             }],
-            'global_merge_vars': [
-                {'name': 'company_name', 'content': 'Intuit Developer Program'}
-            ],
+            'global_merge_vars': _TEMPLATE_GLOBAL_VARS,
             'merge_vars': [
                 {
                     'rcpt': DEFAULT_TO_EMAIL,
@@ -463,31 +707,17 @@ def send_email_with_template():
         }
         
         # Template content for mc:edit regions - use correct region name based on template
-        if template_name == 'template1':
-            template_content = [
-                {
-                    'name': 'welcome_message',
-                    'content': "<hr><p>Thanks for joining <strong>{{company_name}}</strong>! We're excited to have you on board.</p><hr>This email is generated for pre-designed template, generated for template1<hr>"
-                }
-            ]
-        else:
-            template_content = [
-                {
-                    'name': 'goodbye_message',
-                    'content': "<hr><p>We don't have much updates, but this email is for your account: {{account_id}} in company: {{company_name}}</p><hr>"
-                }
-            ]
+        template_content = list(_TEMPLATE_CONTENT.get(template_name, _TEMPLATE_CONTENT['template2']))
 
         # Send the email using the specified template
-        result = mailchimp.messages.send_template({
+        result = EXEC.submit(_do_send_template, {
             'template_name': template_name,
             'template_content': template_content,
             'message': message
-        })
+        }).result(timeout=_SEND_TIMEOUT)
         
         if isinstance(result, list):
-            status_lines = [f"{r['email']}: {r['status']}" for r in result]
-            return '<br>'.join(status_lines)
+            return '<br>'.join(f"{r['email']}: {r['status']}" for r in result)
         else:
             return f"Unexpected result structure: {result}"
     except ApiClientError as error:
@@ -508,11 +738,6 @@ def send_sms_message():
     - The recipient phone number and message can be provided via the web form.
     - Phone numbers must be in E.164 format (e.g., +1234567890).
     """
-    import os
-    
-    # SMS API endpoint (note: uses API version 1.1, not 1.0)
-    SMS_API_ENDPOINT = 'https://mandrillapp.com/api/1.1/messages/send-sms'
-    
     try:
         api_key = MANDRILL_API_KEY
         
@@ -520,36 +745,20 @@ def send_sms_message():
             return "Error: MANDRILL_API_KEY not configured"
         
         # Get values from form or environment
-        to_phone = request.form.get('smsToPhone') or os.getenv('SMS_TO_PHONE', '+1234567890')
-        from_phone = os.getenv('SMS_FROM_PHONE', '+0987654321')
-        message_text = request.form.get('smsMessage') or os.getenv('SMS_MESSAGE', 'Hello from Mandrill SMS!')
-        consent_type = os.getenv('SMS_CONSENT_TYPE', 'onetime')
-        track_clicks = os.getenv('SMS_TRACK_CLICKS', 'false').lower() == 'true'
+        to_phone = request.form.get('smsToPhone') or _SMS_TO_PHONE
+        message_text = request.form.get('smsMessage') or _SMS_MESSAGE
         
-        payload = {
-            'key': api_key,
-            'message': {
-                'sms': {
-                    'text': message_text,
-                    'to': to_phone,
-                    'from': from_phone,
-                    'consent': consent_type,
-                    'track_clicks': track_clicks
-                }
-            }
-        }
+        if not _E164.fullmatch(to_phone):
+            return f"SMS Error: {to_phone} is not an E.164 phone number (e.g., +1234567890)"
         
-        # Send the request
-        response = requests.post(
-            SMS_API_ENDPOINT,
-            json=payload,
-            headers={'Content-Type': 'application/json'},
-            timeout=30
-        )
+        payload = _sms_payload(to_phone, message_text)
+        
+        # Send the request on the background pool, like the email sends
+        response = EXEC.submit(_do_send_sms, payload).result(timeout=_SEND_TIMEOUT)
         
         if response.status_code == 200:
-            result = response.json()
-            print('SMS sent successfully:', result)
+            result = _json_loads(response.content)
+            logger.debug('SMS sent successfully: %s', result)
             
             if isinstance(result, list) and len(result) > 0:
                 first_result = result[0]
@@ -573,6 +782,9 @@ def send_sms_message():
                 pass
             return f"SMS failed (HTTP {response.status_code}): {error_msg}"
             
+    except FutureTimeoutError:
+        # Let the route report the SMS as queued
+        raise
     except requests.exceptions.Timeout:
         return "SMS Error: Request timed out"
     except requests.exceptions.SSLError as e:
@@ -581,9 +793,103 @@ def send_sms_message():
         return f"SMS Error: {str(e)}"
 
 
+# Most messages accepted by one /sendSmsBatch request
+_SMS_BATCH_MAX = 100
+
+# Batch SMS sends get their own small pool, so a large batch never delays the
+# form sends queued on EXEC past their _SEND_TIMEOUT
+SMS_BATCH_EXEC = ThreadPoolExecutor(max_workers=4, thread_name_prefix='mandrill-sms-batch')
+
+
+def _sms_outcome(index, to_phone, future):
+    """
+    Summarize one finished batch SMS send as a JSON-ready dict.
+    """
+    outcome = {'index': index, 'to': to_phone}
+    try:
+        response = future.result()
+    except Exception as e:
+        outcome['error'] = str(e)
+        return outcome
+    if response.status_code != 200:
+        outcome['error'] = f"HTTP {response.status_code}"
+        return outcome
+    try:
+        result = _json_loads(response.content)
+    except ValueError:
+        outcome['error'] = 'Response was not valid JSON'
+        return outcome
+    first_result = result[0] if isinstance(result, list) and result else {}
+    if not isinstance(first_result, dict):
+        first_result = {}
+    outcome['status'] = first_result.get('status', 'unknown')
+    outcome['_id'] = first_result.get('_id')
+    if first_result.get('reject_reason'):
+        outcome['reject_reason'] = first_result['reject_reason']
+    return outcome
+
+
+def _gzip_stream(chunks):
+    """
+    Gzip a stream of byte chunks, flushing after each so the client receives every chunk as it is produced.
+    """
+    compressor = zlib.compressobj(wbits=31)  # wbits=31 writes a gzip header and trailer
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@app.route('/sendSmsBatch', methods=['POST'])
+def send_sms_batch():
+    """
+    Send an SMS to each recipient in a JSON request body, streaming the results back as they complete.
+
+    Technical Documentation:
+    - Expects a JSON list of {"to": "+1234567890", "text": "..."} objects; "text" defaults to SMS_MESSAGE.
+    - Each SMS is posted on the SMS_BATCH_EXEC pool; results are written to the response as each send finishes,
+      so the full batch is never buffered in the worker.
+    - The response is a JSON array of {"index", "to", "status", "_id"} (or "error") objects in completion
+      order; "index" is the message's position in the request.
+    - The stream is gzip-compressed when the client sends Accept-Encoding: gzip.
+
+    User Documentation:
+    - POST up to 100 messages at once, e.g. with curl --compressed -H 'Content-Type: application/json'.
+    - Recipients must be E.164 phone numbers; invalid ones are reported without being sent.
+    """
+    if not MANDRILL_API_KEY:
+        return {'error': 'MANDRILL_API_KEY not configured'}, 500
+
+    messages = request.get_json(silent=True)
+    if not isinstance(messages, list) or not all(isinstance(m, dict) for m in messages):
+        return {'error': 'Expected a JSON list of {"to", "text"} objects'}, 400
+    if len(messages) > _SMS_BATCH_MAX:
+        return {'error': f'At most {_SMS_BATCH_MAX} messages per request'}, 400
+
+    invalid = []
+    pending = {}
+    for index, message in enumerate(messages):
+        to_phone = message.get('to')
+        if not isinstance(to_phone, str) or not _E164.fullmatch(to_phone):
+            invalid.append({'index': index, 'to': to_phone, 'error': 'Not an E.164 phone number'})
+            continue
+        payload = _sms_payload(to_phone, message.get('text') or _SMS_MESSAGE)
+        pending[SMS_BATCH_EXEC.submit(_do_send_sms, payload)] = (index, to_phone)
+
+    def results():
+        outcomes = chain(invalid, (_sms_outcome(*pending[future], future) for future in as_completed(pending)))
+        yield b'['
+        for n, outcome in enumerate(outcomes):
+            yield (b',' if n else b'') + _json_bytes(outcome)
+        yield b']'
+
+    if 'gzip' in request.accept_encodings:
+        return Response(_gzip_stream(results()), mimetype='application/json',
+                        headers={'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'})
+    return Response(results(), mimetype='application/json', headers={'Vary': 'Accept-Encoding'})
+
+
 def send_email_with_template_backup():
     try:
-        mailchimp = MailchimpTransactional.Client(MANDRILL_API_KEY)
         template_name = 'hello-template'
         message = {
             'from_email': DEFAULT_FROM_EMAIL,
@@ -594,9 +900,7 @@ def send_email_with_template_backup():
                 'name': DEFAULT_TO_NAME,
                 'type': 'to'
             }],
-            'global_merge_vars': [
-                {'name': 'company_name', 'content': 'Intuit Developer Program'}
-            ],
+            'global_merge_vars': _TEMPLATE_GLOBAL_VARS,
             'merge_vars': [
                 {
                     'rcpt': DEFAULT_TO_EMAIL,
@@ -615,14 +919,13 @@ def send_email_with_template_backup():
                 'content': "<hr><p>Thanks for joining <strong>{{company_name}}</strong>! We're excited to have you on board.</p><p><p><p><hr>This email is generated for pre-designed template.<hr>"
             }
         ]
-        result = mailchimp.messages.send_template({
+        result = EXEC.submit(_do_send_template, {
             'template_name': template_name,
             'template_content': template_content,
             'message': message
-        })
+        }).result(timeout=_SEND_TIMEOUT)
         if isinstance(result, list):
-            status_lines = [f"{r['email']}: {r['status']}" for r in result]
-            return '<br>'.join(status_lines)
+            return '<br>'.join(f"{r['email']}: {r['status']}" for r in result)
         else:
             return f"Unexpected result structure: {result}"
     except ApiClientError as error:
@@ -641,8 +944,9 @@ def createTemplate(templateName):
     Returns:
         None. Flashes a message to the user and prints the API response for debugging.
     """
+    global _TEMPLATE_NAME_CACHE
     try:
-        mailchimp = MailchimpTransactional.Client(MANDRILL_API_KEY)
+        mailchimp = MAILCHIMP
         
         # Check if a template with the given name already exists
         if template_exists(templateName):
@@ -668,12 +972,14 @@ def createTemplate(templateName):
             }
             # Create the template using the Mailchimp API
             response = mailchimp.templates.add(template_data)
-            print('Create Template Response:', response)
+            logger.debug('Create Template Response: %s', response)
+            # Drop the cached template names so the new template is seen on the next check
+            _TEMPLATE_NAME_CACHE = None
             flash(f'Template created: {response["name"]}', 'info')
 
     except ApiClientError as error:
         # Log the error for debugging
-        print('An exception occurred while creating template: {}'.format(error.text))
+        logger.error('An exception occurred while creating template: %s', error.text)
 
 if __name__ == "__main__":
      app.run(host="0.0.0.0", port=5002, debug=True)
\ No newline at end of file
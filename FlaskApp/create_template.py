@@ -13,49 +13,48 @@ Requirements:
 """
 
 import os
-import mailchimp_transactional as MailchimpTransactional
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from mailchimp_transactional.api_client import ApiClientError
 from dotenv import load_dotenv
+from mandrill_session import get_mailchimp_client
+from _templates import TEMPLATES
 
 # Load environment variables
 load_dotenv()
 
+# Environment snapshot taken once at import; the values don't change while the process runs
+_CFG = SimpleNamespace(
+    api_key=os.getenv('MANDRILL_API_KEY'),
+    from_email=os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+    from_name=os.getenv('DEFAULT_FROM_NAME', 'Test Sender')
+)
 
-def get_mailchimp_client():
-    """
-    Get a Mailchimp Transactional client.
-    """
-    api_key = os.getenv('MANDRILL_API_KEY')
-    if not api_key:
-        raise ValueError("MANDRILL_API_KEY not found in environment variables")
-    return MailchimpTransactional.Client(api_key)
-
-
-# Template definitions matching the Mandrill account
-TEMPLATES = {
-    'template1': {
-        'name': 'template1',
-        'subject': 'Hello {{fname}}!',
-        'code': '''<h1>Hello {{fname}}!</h1>
-                <div mc:edit="welcome_message">
-                  <p>Welcome to {{company_name}}.</p>
-                </div>
-                <p>Your account: {{account_id}}</p>''',
-        'text': 'This is a simple greetings from template1.',
-        'labels': ['demo', 'hello']
-    },
-    'template2': {
-        'name': 'template2',
-        'subject': 'Greetings {{fname}}!',
-        'code': '''<h1>Greetings {{fname}}!</h1>
-                <p>Hope your Account: {{account_id}} is all set in Company: {{company_name}}</p>
-                <div mc:edit="goodbye_message">
-                  <p>We will see you soon {{company_name}}.</p>
-                </div>''',
-        'text': 'This is a simple greetings from template2.',
-        'labels': ['demo', 'hello']
-    }
-}
+
+# Held while the template names are fetched or updated, so concurrent callers list templates once
+_TEMPLATE_LOCK = threading.Lock()
+
+# One lock per template name, held during its check-then-create so two callers never add the
+# same template; different templates are created concurrently
+_CREATE_LOCKS = {}
+
+
+@lru_cache(maxsize=1)
+def _template_name_set():
+    """
+    Fetch the names of all templates once per process. Call with _TEMPLATE_LOCK held.
+    create_template() adds the names of templates it creates, so the set stays current without re-fetching.
+    """
+    return {t['name'] for t in get_mailchimp_client().templates.list({'label': ''})}
+
+
+def invalidate_template_cache():
+    """
+    Forget the cached template names, so the next check fetches them from Mandrill again.
+    """
+    _template_name_set.cache_clear()
 
 
 def template_exists(template_name):
@@ -63,9 +62,8 @@ def template_exists(template_name):
     Check if a template exists in Mandrill.
     """
     try:
-        client = get_mailchimp_client()
-        templates = client.templates.list({'label': ''})
-        return any(t['name'] == template_name for t in templates)
+        with _TEMPLATE_LOCK:
+            return template_name in _template_name_set()
     except ApiClientError:
         return False
 
@@ -74,6 +72,16 @@ def create_template(template_name):
     """
     Create a template if it doesn't already exist.
     """
+    with _TEMPLATE_LOCK:
+        create_lock = _CREATE_LOCKS.setdefault(template_name, threading.Lock())
+    with create_lock:
+        return _create_template(template_name)
+
+
+def _create_template(template_name):
+    """
+    Body of create_template(); runs with the template's lock from _CREATE_LOCKS held.
+    """
     if template_exists(template_name):
         print(f'Template "{template_name}" already exists.')
         return {'success': True, 'exists': True}
@@ -86,8 +94,8 @@ def create_template(template_name):
     
     template_data = {
         'name': template_def['name'],
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+        'from_email': _CFG.from_email,
+        'from_name': _CFG.from_name,
         'subject': template_def['subject'],
         'code': template_def['code'],
         'text': template_def['text'],
@@ -98,6 +106,8 @@ def create_template(template_name):
     try:
         client = get_mailchimp_client()
         response = client.templates.add(template_data)
+        with _TEMPLATE_LOCK:
+            _template_name_set().add(response['name'])
         
         print('Template created successfully!')
         print('=' * 50)
@@ -192,6 +202,7 @@ def delete_template(template_name):
     try:
         client = get_mailchimp_client()
         response = client.templates.delete({'name': template_name})
+        invalidate_template_cache()
         print(f"Template deleted: {template_name}")
         return response
     except ApiClientError as error:
@@ -201,20 +212,18 @@ def delete_template(template_name):
 
 if __name__ == '__main__':
     # Check if API key is configured
-    if not os.getenv('MANDRILL_API_KEY'):
+    if not _CFG.api_key:
         print('Error: MANDRILL_API_KEY not found in environment variables!')
         print('Please create a .env file with your Mandrill API key.')
         exit(1)
     
     print('Creating email templates...\n')
     
-    # Create template1
-    print('Creating template1...')
-    create_template('template1')
-    
-    # Create template2
-    print('\nCreating template2...')
-    create_template('template2')
+    # Create template1 and template2 concurrently; they are independent API calls
+    # and share the client's pooled keep-alive connections
+    print('Creating template1 and template2...')
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(create_template, ['template1', 'template2']))
     
     print('\n\nListing all templates...\n')
     list_templates()
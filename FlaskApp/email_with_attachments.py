@@ -5,62 +5,112 @@ This script demonstrates how to attach files to emails sent via
 Mailchimp Transactional (Mandrill).
 
 Usage:
-    python email_with_attachments.py
+    python email_with_attachments.py [--n N] [--concurrency C]
 
 Requirements:
     - mailchimp-transactional
     - python-dotenv
+    - pybase64 (optional, faster Base64 encoding)
 """
 
+import argparse
 import os
-import base64
+import textwrap
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import mailchimp_transactional as MailchimpTransactional
 from mailchimp_transactional.api_client import ApiClientError
 from dotenv import load_dotenv
+from file_base64 import read_file_as_base64
+from mandrill_session import get_mailchimp_client
+
+# Use the SIMD-accelerated pybase64 for in-memory attachments when it is installed
+try:
+    from pybase64 import b64encode_as_string
+except ImportError:
+    from base64 import b64encode
+
+    def b64encode_as_string(data):
+        return b64encode(data).decode('ascii')
+
+# Compact JSON serialized straight to bytes; orjson when it is installed
+try:
+    from orjson import dumps as json_dumps
+except ImportError:
+    import json
+
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the API client
-mailchimp = MailchimpTransactional.Client(os.getenv('MANDRILL_API_KEY'))
-
-
-def read_file_as_base64(file_path):
+# Environment snapshot taken once at import; the values don't change while the process runs
+_CFG = SimpleNamespace(
+    api_key=os.getenv('MANDRILL_API_KEY'),
+    from_email=os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+    from_name=os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+    to_email=os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+    to_name=os.getenv('DEFAULT_TO_NAME', 'Test Recipient'),
+    # send_json_attachment has its own fallbacks for the sender name and recipient
+    export_from_name=os.getenv('DEFAULT_FROM_NAME', 'Data Export Service'),
+    export_to_email=os.getenv('DEFAULT_TO_EMAIL', 'test@example.org')
+)
+
+# Static sample attachment, resolved once at import
+_SAMPLE_PDF = os.path.join(os.path.dirname(__file__), 'sample.pdf')
+
+# MIME types for the attachment kinds these samples send
+_MIMETYPES = {
+    '.pdf': 'application/pdf',
+    '.csv': 'text/csv',
+    '.json': 'application/json',
+    '.txt': 'text/plain'
+}
+
+# Body of the documents email, dedented once at import
+_DOCUMENTS_HTML = textwrap.dedent('''
+    <h1>Your Documents</h1>
+    <p>Please find the attached files for your review.</p>
+    <ul>
+        <li>Sample PDF document</li>
+        <li>Readme text file</li>
+    </ul>
+''').strip()
+
+
+def encode_attachment(spec):
     """
-    Helper to read a local file and return a Base64 string.
+    Build a Mandrill attachment from a (MIME type, file name, source) spec.
 
     Args:
-        file_path: Path to the file to read
+        spec: Tuple of MIME type, attachment file name, and either a file
+            path or the raw bytes to attach
 
     Returns:
-        Base64-encoded string of the file contents
+        Attachment dict, or None if the source file could not be read
     """
-    try:
-        with open(file_path, 'rb') as file:
-            return base64.b64encode(file.read()).decode('utf-8')
-    except FileNotFoundError:
-        print(f'Warning: File not found: {file_path}')
+    mime_type, name, source = spec
+    if isinstance(source, bytes):
+        content = b64encode_as_string(source)
+    else:
+        content = read_file_as_base64(source)
+        if content is None:
+            print(f'Warning: File not found: {source}')
+    if not content:
         return None
+    return {'type': mime_type, 'name': name, 'content': content}
 
 
 def send_with_attachments():
     """
     Send an email with file attachments.
     """
-    # Prepare attachments
-    attachments = []
-
-    # Try to attach a PDF file if it exists
-    sample_pdf_path = os.path.join(os.path.dirname(__file__), 'sample.pdf')
-    if os.path.exists(sample_pdf_path):
-        pdf_content = read_file_as_base64(sample_pdf_path)
-        if pdf_content:
-            attachments.append({
-                'type': 'application/pdf',
-                'name': 'sample.pdf',
-                'content': pdf_content
-            })
+    # Prepare attachment specs: (MIME type, file name, file path or raw bytes)
+    attachment_specs = []
+
+    # Attach the sample PDF if it exists (encode_attachment skips it otherwise)
+    attachment_specs.append((_MIMETYPES['.pdf'], 'sample.pdf', _SAMPLE_PDF))
 
     # Create a text file attachment dynamically
     text_content = (
@@ -68,29 +118,21 @@ def send_with_attachments():
         f'Generated at: {datetime.now().isoformat()}\n'
         f'This file was created using Python.\n'
     )
-    attachments.append({
-        'type': 'text/plain',
-        'name': 'readme.txt',
-        'content': base64.b64encode(text_content.encode('utf-8')).decode('utf-8')
-    })
+    attachment_specs.append((_MIMETYPES['.txt'], 'readme.txt', text_content.encode('utf-8')))
+
+    # Encode inline; the PDF comes from the encoding cache, so there is no disk read to overlap
+    attachments = [a for a in map(encode_attachment, attachment_specs) if a]
 
     message = {
-        'html': '''
-            <h1>Your Documents</h1>
-            <p>Please find the attached files for your review.</p>
-            <ul>
-                <li>Sample PDF document</li>
-                <li>Readme text file</li>
-            </ul>
-        ''',
+        'html': _DOCUMENTS_HTML,
         'text': 'Your documents are attached. Please review them at your convenience.',
         'subject': 'Documents Attached',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+        'from_email': _CFG.from_email,
+        'from_name': _CFG.from_name,
         'to': [
             {
-                'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
-                'name': os.getenv('DEFAULT_TO_NAME', 'Test Recipient'),
+                'email': _CFG.to_email,
+                'name': _CFG.to_name,
                 'type': 'to'
             }
         ],
@@ -99,17 +141,19 @@ def send_with_attachments():
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = get_mailchimp_client().messages.send({'message': message})
 
         print('Email with attachments sent successfully!')
         print('=' * 50)
         print(f'Number of attachments: {len(attachments)}')
 
         if isinstance(result, list):
-            for r in result:
-                print(f"{r['email']}: {r['status']}")
-                if r.get('_id'):
-                    print(f"  Message ID: {r['_id']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(
+                f"{r['email']}: {r['status']}"
+                + (f"\n  Message ID: {r['_id']}" if r.get('_id') else '')
+                for r in result
+            ))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -135,20 +179,20 @@ def send_csv_attachment():
     csv_content += "Bob Johnson,bob@example.org,Pending,2024-03-10\n"
 
     attachments = [{
-        'type': 'text/csv',
+        'type': _MIMETYPES['.csv'],
         'name': 'user_report.csv',
-        'content': base64.b64encode(csv_content.encode('utf-8')).decode('utf-8')
+        'content': b64encode_as_string(csv_content.encode('utf-8'))
     }]
 
     message = {
         'html': '<h1>User Report</h1><p>Please find the attached CSV report.</p>',
         'text': 'User Report - CSV file attached.',
         'subject': 'User Report - CSV Attached',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+        'from_email': _CFG.from_email,
         'from_name': 'Report Service',
         'to': [
             {
-                'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+                'email': _CFG.to_email,
                 'type': 'to'
             }
         ],
@@ -157,13 +201,13 @@ def send_csv_attachment():
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = get_mailchimp_client().messages.send({'message': message})
 
         print('CSV report email sent successfully!')
 
         if isinstance(result, list):
-            for r in result:
-                print(f"{r['email']}: {r['status']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(f"{r['email']}: {r['status']}" for r in result))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -179,8 +223,6 @@ def send_json_attachment():
     """
     Send an email with a JSON attachment.
     """
-    import json
-
     # Create JSON data
     data = {
         'status': 'success',
@@ -193,32 +235,33 @@ def send_json_attachment():
         ]
     }
 
-    json_content = json.dumps(data, indent=2)
+    # Compact JSON, serialized straight to bytes
+    json_bytes = json_dumps(data)
 
     attachments = [{
-        'type': 'application/json',
+        'type': _MIMETYPES['.json'],
         'name': 'data.json',
-        'content': base64.b64encode(json_content.encode('utf-8')).decode('utf-8')
+        'content': b64encode_as_string(json_bytes)
     }]
 
     message = {
         'html': '<h1>API Response Data</h1><p>JSON data file attached.</p>',
         'subject': 'API Data Export',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Data Export Service'),
-        'to': [{'email': os.getenv('DEFAULT_TO_EMAIL', 'test@example.org'), 'type': 'to'}],
+        'from_email': _CFG.from_email,
+        'from_name': _CFG.export_from_name,
+        'to': [{'email': _CFG.export_to_email, 'type': 'to'}],
         'attachments': attachments,
         'tags': ['api', 'json']
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = get_mailchimp_client().messages.send({'message': message})
 
         print('JSON attachment email sent successfully!')
 
         if isinstance(result, list):
-            for r in result:
-                print(f"{r['email']}: {r['status']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(f"{r['email']}: {r['status']}" for r in result))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -231,14 +274,23 @@ def send_json_attachment():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Send the attachments demo email.')
+    parser.add_argument('--n', type=int, default=1, help='number of sends (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=4, help='sends in flight at once (default: 4)')
+    args = parser.parse_args()
+    if args.n < 1 or args.concurrency < 1:
+        parser.error('--n and --concurrency must be at least 1')
+
     # Check if API key is configured
-    if not os.getenv('MANDRILL_API_KEY'):
+    if not _CFG.api_key:
         print('Error: MANDRILL_API_KEY not found in environment variables!')
         print('Please create a .env file with your Mandrill API key.')
         exit(1)
 
     print('Sending email with attachments...\n')
-    send_with_attachments()
+    # Every send reuses the one client; the sample files are encoded on the first send and cached
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(lambda _: send_with_attachments(), range(args.n)))
 
     # Uncomment to test CSV attachment
     # print('\n\nSending CSV attachment...\n')
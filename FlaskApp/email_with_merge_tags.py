@@ -5,23 +5,61 @@ This script demonstrates how to personalize emails using merge tags
 for dynamic content like names, order information, and custom data.
 
 Usage:
-    python email_with_merge_tags.py
+    python email_with_merge_tags.py [--n N] [--concurrency C]
 
 Requirements:
     - mailchimp-transactional
     - python-dotenv
 """
 
+import argparse
 import os
-import mailchimp_transactional as MailchimpTransactional
+from concurrent.futures import ThreadPoolExecutor
+import textwrap
+from types import SimpleNamespace
 from mailchimp_transactional.api_client import ApiClientError
 from dotenv import load_dotenv
+from mandrill_session import get_mailchimp_client
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the API client
-mailchimp = MailchimpTransactional.Client(os.getenv('MANDRILL_API_KEY'))
+# Environment snapshot taken once at import; the values don't change while the process runs
+_CFG = SimpleNamespace(
+    api_key=os.getenv('MANDRILL_API_KEY'),
+    from_email=os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+    from_name=os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+    to_email=os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+    to_name=os.getenv('DEFAULT_TO_NAME', 'Test Recipient')
+)
+
+
+# Welcome email bodies, dedented once at import so no indentation is sent over the wire
+_WELCOME_HTML = textwrap.dedent('''
+    <h1>Welcome {{fname}}!</h1>
+    <p>Hi {{fname}} {{lname}},</p>
+    <p>Thanks for joining the {{company_name}}! Your account is now active.</p>
+    <p>Your membership level: {{membership_level}}</p>
+    <p>Best regards,<br>The {{company_name}} Team</p>
+''').strip()
+
+_WELCOME_TEXT = textwrap.dedent('''
+    Welcome {{fname}}!
+
+    Hi {{fname}} {{lname}},
+
+    Thanks for joining the {{company_name}}! Your account is now active.
+    Your membership level: {{membership_level}}
+
+    Best regards,
+    The {{company_name}} Team
+''').strip()
+
+# Global merge variables for the welcome email, shared by every send
+_WELCOME_GLOBAL_VARS = (
+    {'name': 'company_name', 'content': 'Intuit Developer Program'},
+    {'name': 'membership_level', 'content': 'Premium'}
+)
 
 
 def send_personalized_email():
@@ -29,50 +67,25 @@ def send_personalized_email():
     Send a personalized email using merge tags for dynamic content.
     """
     message = {
-        'html': '''
-            <h1>Welcome {{fname}}!</h1>
-            <p>Hi {{fname}} {{lname}},</p>
-            <p>Thanks for joining the {{company_name}}! Your account is now active.</p>
-            <p>Your membership level: {{membership_level}}</p>
-            <p>Best regards,<br>The {{company_name}} Team</p>
-        ''',
-        'text': '''
-            Welcome {{fname}}!
-            
-            Hi {{fname}} {{lname}},
-            
-            Thanks for joining the {{company_name}}! Your account is now active.
-            Your membership level: {{membership_level}}
-            
-            Best regards,
-            The {{company_name}} Team
-        ''',
+        'html': _WELCOME_HTML,
+        'text': _WELCOME_TEXT,
         'subject': 'Welcome to {{company_name}}, {{fname}}!',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+        'from_email': _CFG.from_email,
+        'from_name': _CFG.from_name,
         'to': [{
-            'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
-            'name': os.getenv('DEFAULT_TO_NAME', 'Test Recipient'),
+            'email': _CFG.to_email,
+            'name': _CFG.to_name,
             'type': 'to'
         }],
         'headers': {
-            'Reply-To': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org')
+            'Reply-To': _CFG.from_email
         },
         # Global merge variables (apply to all recipients)
-        'global_merge_vars': [
-            {
-                'name': 'company_name',
-                'content': 'Intuit Developer Program'
-            },
-            {
-                'name': 'membership_level',
-                'content': 'Premium'
-            }
-        ],
+        'global_merge_vars': _WELCOME_GLOBAL_VARS,
         # Recipient-specific merge variables
         'merge_vars': [
             {
-                'rcpt': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+                'rcpt': _CFG.to_email,
                 'vars': [
                     {
                         'name': 'fname',
@@ -89,16 +102,18 @@ def send_personalized_email():
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = get_mailchimp_client().messages.send({'message': message})
 
         print('Personalized email sent successfully!')
         print('=' * 50)
 
         if isinstance(result, list):
-            for recipient in result:
-                print(f"{recipient['email']}: {recipient['status']}")
-                if recipient.get('_id'):
-                    print(f"  Message ID: {recipient['_id']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(
+                f"{recipient['email']}: {recipient['status']}"
+                + (f"\n  Message ID: {recipient['_id']}" if recipient.get('_id') else '')
+                for recipient in result
+            ))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -113,19 +128,45 @@ def send_personalized_email():
         return None
 
 
+# Parts of the multi-recipient message that are the same on every call
+_BASE_MESSAGE = {
+    'html': textwrap.dedent('''
+        <h1>Welcome {{fname}}!</h1>
+        <p>Your account {{account_id}} is now active.</p>
+        <p>Membership: {{membership_level}}</p>
+    ''').strip(),
+    'subject': 'Welcome {{fname}} to {{company_name}}!',
+    'from_email': _CFG.from_email,
+    'from_name': _CFG.from_name,
+    'global_merge_vars': (
+        {'name': 'company_name', 'content': 'Intuit Developer Program'},
+    ),
+    'merge_language': 'handlebars'
+}
+
+
+def _build_merge_vars(per_recipient):
+    """
+    Convert (email, {name: value}) pairs into Mandrill's merge_vars list.
+
+    Args:
+        per_recipient: Iterable of (recipient email, flat dict of merge values) pairs
+
+    Returns:
+        List of {'rcpt', 'vars'} entries for the message's merge_vars, one per pair
+    """
+    return [
+        {'rcpt': email, 'vars': [{'name': k, 'content': v} for k, v in merge_values.items()]}
+        for email, merge_values in per_recipient
+    ]
+
+
 def send_to_multiple_recipients():
     """
     Send personalized emails to multiple recipients with different merge data.
     """
     message = {
-        'html': '''
-            <h1>Welcome {{fname}}!</h1>
-            <p>Your account {{account_id}} is now active.</p>
-            <p>Membership: {{membership_level}}</p>
-        ''',
-        'subject': 'Welcome {{fname}} to {{company_name}}!',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+        **_BASE_MESSAGE,
         'to': [
             {
                 'email': 'john@example.org',
@@ -138,39 +179,21 @@ def send_to_multiple_recipients():
                 'type': 'to'
             }
         ],
-        'global_merge_vars': [
-            {'name': 'company_name', 'content': 'Intuit Developer Program'}
-        ],
-        'merge_vars': [
-            {
-                'rcpt': 'john@example.org',
-                'vars': [
-                    {'name': 'fname', 'content': 'John'},
-                    {'name': 'account_id', 'content': 'ACC-001'},
-                    {'name': 'membership_level', 'content': 'Premium'}
-                ]
-            },
-            {
-                'rcpt': 'jane@example.org',
-                'vars': [
-                    {'name': 'fname', 'content': 'Jane'},
-                    {'name': 'account_id', 'content': 'ACC-002'},
-                    {'name': 'membership_level', 'content': 'Standard'}
-                ]
-            }
-        ],
-        'merge_language': 'handlebars'
+        'merge_vars': _build_merge_vars([
+            ('john@example.org', {'fname': 'John', 'account_id': 'ACC-001', 'membership_level': 'Premium'}),
+            ('jane@example.org', {'fname': 'Jane', 'account_id': 'ACC-002', 'membership_level': 'Standard'})
+        ])
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = get_mailchimp_client().messages.send({'message': message})
 
         print('Batch personalized emails sent!')
         print('=' * 50)
 
         if isinstance(result, list):
-            for recipient in result:
-                print(f"{recipient['email']}: {recipient['status']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(f"{recipient['email']}: {recipient['status']}" for recipient in result))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -182,16 +205,68 @@ def send_to_multiple_recipients():
         return None
 
 
+def send_bulk_personalized(recipients):
+    """
+    Send personalized emails to any number of recipients in a single API call.
+
+    Args:
+        recipients: List of dicts with 'email', optional 'name', and optional 'vars' dict of merge values
+
+    Returns:
+        List of per-recipient send results (empty if there are no recipients), or None on error
+    """
+    if not recipients:
+        return []
+
+    message = {
+        **_BASE_MESSAGE,
+        'to': [
+            {'email': r['email'], 'name': r.get('name', ''), 'type': 'to'}
+            for r in recipients
+        ],
+        # Built from the list, so a repeated address keeps its entry instead of being collapsed
+        'merge_vars': _build_merge_vars((r['email'], r.get('vars', {})) for r in recipients),
+        # Each recipient only sees their own address in the To: header
+        'preserve_recipients': False
+    }
+
+    try:
+        result = get_mailchimp_client().messages.send({'message': message})
+        print(f'Bulk personalized email sent to {len(recipients)} recipients')
+        return result
+
+    except ApiClientError as error:
+        print(f'Error: {error.text}')
+        return None
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Send the personalized merge-tag demo email.')
+    parser.add_argument('--n', type=int, default=1, help='number of sends (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=4, help='sends in flight at once (default: 4)')
+    args = parser.parse_args()
+    if args.n < 1 or args.concurrency < 1:
+        parser.error('--n and --concurrency must be at least 1')
+
     # Check if API key is configured
-    if not os.getenv('MANDRILL_API_KEY'):
+    if not _CFG.api_key:
         print('Error: MANDRILL_API_KEY not found in environment variables!')
         print('Please create a .env file with your Mandrill API key.')
         exit(1)
 
     print('Sending personalized email...\n')
-    send_personalized_email()
+    # Every send reuses the one client and its pooled connections
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(lambda _: send_personalized_email(), range(args.n)))
 
     # Uncomment to test multiple recipients
     # print('\n\nSending to multiple recipients...\n')
     # send_to_multiple_recipients()
+
+    # Uncomment to test a bulk send (one API call for all recipients)
+    # send_bulk_personalized([
+    #     {'email': 'john@example.org', 'name': 'John Smith',
+    #      'vars': {'fname': 'John', 'account_id': 'ACC-001', 'membership_level': 'Premium'}},
+    #     {'email': 'jane@example.org', 'name': 'Jane Doe',
+    #      'vars': {'fname': 'Jane', 'account_id': 'ACC-002', 'membership_level': 'Standard'}}
+    # ])
@@ -5,7 +5,7 @@ This script demonstrates how to send a single email to a single recipient
 using the mailchimp_transactional Python library.
 
 Usage:
-    python email_with_single_recipient.py
+    python email_with_single_recipient.py [--n N] [--concurrency C] [--advanced]
 
 Requirements:
     - mailchimp-transactional
@@ -15,16 +15,33 @@ Install with:
     pip install mailchimp-transactional python-dotenv
 """
 
+import argparse
 import os
-import mailchimp_transactional as MailchimpTransactional
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
 from mailchimp_transactional.api_client import ApiClientError
 from dotenv import load_dotenv
+from mandrill_batcher import SENDER
+from mandrill_session import get_mailchimp_client
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize the Mandrill API client
-mailchimp = MailchimpTransactional.Client(os.getenv('MANDRILL_API_KEY'))
+logger = logging.getLogger(__name__)
+
+# Separator line around send results, only logged at DEBUG
+BANNER = '=' * 50
+
+# Environment snapshot taken once at import; the values don't change while the process runs
+_CFG = SimpleNamespace(
+    api_key=os.getenv('MANDRILL_API_KEY'),
+    from_email=os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+    from_name=os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+    to_email=os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+    to_name=os.getenv('DEFAULT_TO_NAME', 'Test Recipient')
+)
+
 
 def send_email():
     """
@@ -38,47 +55,43 @@ def send_email():
         'html': '<p>Hello HTML world!</p>',
         'text': 'Hello plain world!',
         'subject': 'Hello world',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+        'from_email': _CFG.from_email,
+        'from_name': _CFG.from_name,
         'to': [{
-            'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
-            'name': os.getenv('DEFAULT_TO_NAME', 'Test Recipient'),
+            'email': _CFG.to_email,
+            'name': _CFG.to_name,
             'type': 'to'
         }],
         'headers': {
-            'Reply-To': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org')
+            'Reply-To': _CFG.from_email
         }
     }
     
     try:
         # Send the message
-        response = mailchimp.messages.send({
-            'message': message
-        })
+        response = SENDER.submit(message).result()
         
-        print('Email sent successfully!')
-        print('=' * 50)
+        logger.info('Email sent successfully!')
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(BANNER)
         
-        # Display the response details
+        # Log the response details; arguments are only formatted if the record is emitted
         if response and len(response) > 0:
             result = response[0]
-            print(f'Status: {result.get("status", "unknown")}')
-            print(f'Email: {result.get("email", "N/A")}')
-            print(f'Message ID: {result.get("_id", "N/A")}')
+            logger.info('status=%s email=%s id=%s', result.get('status'), result.get('email'), result.get('_id'))
             
             if result.get('reject_reason'):
-                print(f'Reject Reason: {result["reject_reason"]}')
+                logger.info('reject_reason=%s', result['reject_reason'])
         else:
-            print(f'Unexpected result structure: {response}')
+            logger.warning('Unexpected result structure: %s', response)
         
-        print('=' * 50)
+        if debug:
+            logger.debug(BANNER)
         return response
         
     except ApiClientError as error:
-        print('Error sending email!')
-        print('=' * 50)
-        print(f'Mandrill API Error: {error.text}')
-        print('=' * 50)
+        logger.error('Error sending email! Mandrill API Error: %s', error.text)
         return None
 
 def send_email_with_advanced_options():
@@ -92,15 +105,15 @@ def send_email_with_advanced_options():
         'html': '<p>Hello <strong>HTML</strong> world!</p>',
         'text': 'Hello plain world!',
         'subject': 'Advanced Email Test',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+        'from_email': _CFG.from_email,
+        'from_name': _CFG.from_name,
         'to': [{
-            'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
-            'name': os.getenv('DEFAULT_TO_NAME', 'Test Recipient'),
+            'email': _CFG.to_email,
+            'name': _CFG.to_name,
             'type': 'to'
         }],
         'headers': {
-            'Reply-To': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+            'Reply-To': _CFG.from_email,
             'X-MC-Track': 'opens,clicks'
         },
         'important': True,
@@ -118,42 +131,57 @@ def send_email_with_advanced_options():
     }
     
     try:
-        response = mailchimp.messages.send({
+        response = get_mailchimp_client().messages.send({
             'message': message
         })
         
-        print('Advanced email sent successfully!')
-        print('=' * 50)
+        logger.info('Advanced email sent successfully!')
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(BANNER)
         
         if response and len(response) > 0:
             result = response[0]
-            print(f'Status: {result.get("status", "unknown")}')
-            print(f'Email: {result.get("email", "N/A")}')
-            print(f'Message ID: {result.get("_id", "N/A")}')
+            logger.info('status=%s email=%s id=%s', result.get('status'), result.get('email'), result.get('_id'))
         
-        print('=' * 50)
+        if debug:
+            logger.debug(BANNER)
         return response
         
     except ApiClientError as error:
-        print('Error sending advanced email!')
-        print('=' * 50)
-        print(f'Mandrill API Error: {error.text}')
-        print('=' * 50)
+        logger.error('Error sending advanced email! Mandrill API Error: %s', error.text)
         return None
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Send the single-recipient demo emails.')
+    parser.add_argument('--n', type=int, default=1, help='number of sends (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=4, help='sends in flight at once (default: 4)')
+    parser.add_argument('--advanced', action='store_true', help='also send the advanced-options email')
+    args = parser.parse_args()
+    if args.n < 1 or args.concurrency < 1:
+        parser.error('--n and --concurrency must be at least 1')
+
     # Check if API key is configured
-    if not os.getenv('MANDRILL_API_KEY'):
+    if not _CFG.api_key:
         print('Error: MANDRILL_API_KEY not found in environment variables!')
         print('Please create a .env file with your Mandrill API key.')
         exit(1)
     
+    # Show send results on the console; LOG_LEVEL=DEBUG adds the separator lines.
+    # Level names are accepted in any case; an unknown name falls back to INFO
+    log_level = logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper())
+    logging.basicConfig(level=log_level if isinstance(log_level, int) else logging.INFO, format='%(message)s')
+    
     print('Sending basic email...')
-    send_email()
+    demos = [send_email] * args.n
     
-    print('\n')
+    if args.advanced:
+        print('Sending email with advanced options...')
+        demos += [send_email_with_advanced_options] * args.n
     
-    # Uncomment to test advanced options
-    # print('Sending email with advanced options...')
-    # send_email_with_advanced_options()
+    # Run the sends concurrently; they are independent API calls
+    # and share the client's pooled keep-alive connections
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for future in as_completed([executor.submit(send) for send in demos]):
+            future.result()
 
@@ -5,7 +5,7 @@ This script demonstrates how to send emails using pre-created templates
 with merge tags and dynamic content.
 
 Usage:
-    python email_with_template.py
+    python email_with_template.py [--n N] [--concurrency C]
 
 Requirements:
     - mailchimp-transactional
@@ -14,101 +14,64 @@ Requirements:
 Note: Templates will be automatically created if they don't exist.
 """
 
+import argparse
 import os
-import mailchimp_transactional as MailchimpTransactional
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from mailchimp_transactional.api_client import ApiClientError
 from dotenv import load_dotenv
+from _templates import TEMPLATES
+from create_template import ensure_template_exists, invalidate_template_cache
+from mandrill_session import get_mailchimp_client
 
 # Load environment variables
 load_dotenv()
 
-
-# Template definitions matching the Mandrill account
-TEMPLATES = {
-    'template1': {
-        'name': 'template1',
-        'subject': 'Hello {{fname}}!',
-        'code': '''<h1>Hello {{fname}}!</h1>
-                <div mc:edit="welcome_message">
-                  <p>Welcome to {{company_name}}.</p>
-                </div>
-                <p>Your account: {{account_id}}</p>''',
-        'text': 'This is a simple greetings from template1.',
-        'labels': ['demo', 'hello'],
-        'mc_edit_region': 'welcome_message'
-    },
-    'template2': {
-        'name': 'template2',
-        'subject': 'Greetings {{fname}}!',
-        'code': '''<h1>Greetings {{fname}}!</h1>
-                <p>Hope your Account: {{account_id}} is all set in Company: {{company_name}}</p>
-                <div mc:edit="goodbye_message">
-                  <p>We will see you soon {{company_name}}.</p>
-                </div>''',
-        'text': 'This is a simple greetings from template2.',
-        'labels': ['demo', 'hello'],
-        'mc_edit_region': 'goodbye_message'
-    }
-}
+# Environment snapshot taken once at import; the values don't change while the process runs
+_CFG = SimpleNamespace(
+    api_key=os.getenv('MANDRILL_API_KEY'),
+    from_email=os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+    from_name=os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+    to_email=os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+    to_name=os.getenv('DEFAULT_TO_NAME', 'Test Recipient')
+)
 
 
-def get_mailchimp_client():
-    """
-    Get a Mailchimp Transactional client.
-    Creates a new client each time to ensure correct API key is used.
-    """
-    api_key = os.getenv('MANDRILL_API_KEY')
-    if not api_key:
-        raise ValueError("MANDRILL_API_KEY not found in environment variables")
-    return MailchimpTransactional.Client(api_key)
+# Merge vars shared by every template send; only per-recipient vars are built per call
+_GLOBAL_VARS = (
+    {'name': 'company_name', 'content': 'Intuit Developer Program'},
+)
 
 
-def template_exists(template_name):
+def _error_name(error):
     """
-    Check if a template exists in Mandrill.
+    Mandrill's error name (e.g. 'Unknown_Template') from an ApiClientError.
+    The SDK puts the parsed JSON error body in error.text; a non-JSON body is left as a string.
     """
-    try:
-        client = get_mailchimp_client()
-        templates = client.templates.list({'label': ''})
-        return any(t['name'] == template_name for t in templates)
-    except ApiClientError:
-        return False
+    if isinstance(error.text, dict):
+        return error.text.get('name')
+    if 'Unknown_Template' in error.text:
+        return 'Unknown_Template'
+    return None
 
 
-def ensure_template_exists(template_name):
+def _send_template(params):
     """
-    Ensure a template exists, creating it if necessary.
-    Returns True if template exists or was created successfully.
+    Call messages.send_template, recovering once if the cached template list was stale.
+
+    Template existence is checked against a per-process cache, so a template deleted
+    in Mandrill since then is recreated and the send retried.
     """
-    if template_exists(template_name):
-        print(f'Template "{template_name}" already exists.')
-        return True
-    
-    if template_name not in TEMPLATES:
-        print(f'Unknown template: {template_name}')
-        return False
-    
-    template_def = TEMPLATES[template_name]
-    
-    template_data = {
-        'name': template_def['name'],
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
-        'subject': template_def['subject'],
-        'code': template_def['code'],
-        'text': template_def['text'],
-        'publish': False,
-        'labels': template_def['labels']
-    }
-    
+    client = get_mailchimp_client()
     try:
-        client = get_mailchimp_client()
-        response = client.templates.add(template_data)
-        print(f'Template "{template_name}" created successfully!')
-        return True
+        return client.messages.send_template(params)
     except ApiClientError as error:
-        print(f'Error creating template: {error.text}')
-        return False
+        if _error_name(error) != 'Unknown_Template':
+            raise
+        invalidate_template_cache()
+        if not ensure_template_exists(params['template_name']):
+            raise
+        return client.messages.send_template(params)
 
 
 def send_with_template(template_name='template1'):
@@ -124,22 +87,20 @@ def send_with_template(template_name='template1'):
     template_def = TEMPLATES.get(template_name, TEMPLATES['template1'])
 
     message = {
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+        'from_email': _CFG.from_email,
+        'from_name': _CFG.from_name,
         'subject': 'Welcome, {{fname}}',
         'to': [
             {
-                'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
-                'name': os.getenv('DEFAULT_TO_NAME', 'Test Recipient'),
+                'email': _CFG.to_email,
+                'name': _CFG.to_name,
                 'type': 'to'
             }
         ],
-        'global_merge_vars': [
-            {'name': 'company_name', 'content': 'Intuit Developer Program'}
-        ],
+        'global_merge_vars': _GLOBAL_VARS,
         'merge_vars': [
             {
-                'rcpt': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+                'rcpt': _CFG.to_email,
                 'vars': [
                     {'name': 'fname', 'content': 'John'},
                     {'name': 'account_id', 'content': 'ACC-001'}
@@ -151,24 +112,10 @@ def send_with_template(template_name='template1'):
     }
 
     # Template content for mc:edit regions
-    if template_name == 'template1':
-        template_content = [
-            {
-                'name': 'welcome_message',
-                'content': "<p>Thanks for joining <strong>{{company_name}}</strong>! We're excited to have you on board.</p>"
-            }
-        ]
-    else:
-        template_content = [
-            {
-                'name': 'goodbye_message',
-                'content': "<p>We don't have much updates, but this email is for your account: {{account_id}} in company: {{company_name}}</p>"
-            }
-        ]
+    template_content = list(template_def['default_content'])
 
     try:
-        client = get_mailchimp_client()
-        result = client.messages.send_template({
+        result = _send_template({
             'template_name': template_name,
             'template_content': template_content,
             'message': message
@@ -178,10 +125,12 @@ def send_with_template(template_name='template1'):
         print('=' * 50)
 
         if isinstance(result, list):
-            for r in result:
-                print(f"   {r['email']}: {r['status']}")
-                if r.get('_id'):
-                    print(f"      Message ID: {r['_id']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(
+                f"   {r['email']}: {r['status']}"
+                + (f"\n      Message ID: {r['_id']}" if r.get('_id') else '')
+                for r in result
+            ))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -206,16 +155,14 @@ def send_template_to_multiple_recipients(template_name='template1'):
         return None
 
     message = {
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+        'from_email': _CFG.from_email,
         'from_name': 'Welcome Team',
         'subject': 'Welcome {{fname}} to {{company_name}}',
         'to': [
             {'email': 'user1@example.org', 'name': 'User One', 'type': 'to'},
             {'email': 'user2@example.org', 'name': 'User Two', 'type': 'to'}
         ],
-        'global_merge_vars': [
-            {'name': 'company_name', 'content': 'Intuit Developer Program'}
-        ],
+        'global_merge_vars': _GLOBAL_VARS,
         'merge_vars': [
             {
                 'rcpt': 'user1@example.org',
@@ -246,8 +193,7 @@ def send_template_to_multiple_recipients(template_name='template1'):
     ]
 
     try:
-        client = get_mailchimp_client()
-        result = client.messages.send_template({
+        result = _send_template({
             'template_name': template_name,
             'template_content': template_content,
             'message': message
@@ -257,8 +203,8 @@ def send_template_to_multiple_recipients(template_name='template1'):
         print('=' * 50)
 
         if isinstance(result, list):
-            for r in result:
-                print(f"   {r['email']}: {r['status']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(f"   {r['email']}: {r['status']}" for r in result))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -271,8 +217,15 @@ def send_template_to_multiple_recipients(template_name='template1'):
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Send the stored-template demo email.')
+    parser.add_argument('--n', type=int, default=1, help='number of sends (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=4, help='sends in flight at once (default: 4)')
+    args = parser.parse_args()
+    if args.n < 1 or args.concurrency < 1:
+        parser.error('--n and --concurrency must be at least 1')
+
     # Check if API key is configured
-    if not os.getenv('MANDRILL_API_KEY'):
+    if not _CFG.api_key:
         print('Error: MANDRILL_API_KEY not found in environment variables!')
         print('Please create a .env file with your Mandrill API key.')
         exit(1)
@@ -281,7 +234,9 @@ if __name__ == '__main__':
     template_name = os.getenv('SELECTED_TEMPLATE', 'template1')
 
     print(f'Sending email with template: {template_name}...\n')
-    send_with_template(template_name)
+    # The template list is fetched once and cached, so only the first send checks Mandrill for it
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(lambda _: send_with_template(template_name), range(args.n)))
 
     # Uncomment to test multiple recipients
     # print('\n\nSending template to multiple recipients...\n')
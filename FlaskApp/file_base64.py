@@ -0,0 +1,61 @@
+"""
+Cached Base64 encoding of files on disk, shared by the Flask app and the sample scripts.
+
+Technical Documentation:
+- Files are encoded in chunks, so the whole raw file is never held in memory alongside its encoding.
+- Encodings are cached per (path, modification time, size), so an unchanged file is read and encoded only once
+  and an edited file is re-encoded automatically.
+- A cached encoding is the same string object on every call, so messages built from it can be compared cheaply.
+- Uses the SIMD-accelerated pybase64 when it is installed, falling back to the stdlib base64 module.
+
+User Documentation:
+- Call read_file_as_base64(path) to get a file's contents as a Base64 string, or None if the file does not exist.
+- Callers that already have an os.stat() result can call b64_file(path, st.st_mtime_ns, st.st_size) directly.
+"""
+import os
+from functools import lru_cache
+
+try:
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+# Read size for streamed Base64 encoding; a multiple of 3 so no padding appears mid-stream
+CHUNK_SIZE = 57 * 4096
+
+
+@lru_cache(maxsize=32)
+def b64_file(path, mtime_ns, size):
+    """
+    Read a file and return its contents as a Base64 string.
+
+    Args:
+        path: Path to the file to read
+        mtime_ns: The file's st_mtime_ns; part of the cache key only
+        size: The file's st_size; part of the cache key only
+
+    Returns:
+        Base64-encoded string of the file contents
+    """
+    buf = bytearray()
+    with open(path, 'rb', buffering=1 << 20) as file:
+        while chunk := file.read(CHUNK_SIZE):
+            buf += b64encode(chunk)
+    return buf.decode('ascii')
+
+
+def read_file_as_base64(file_path):
+    """
+    Return a file's contents as a Base64 string from the encoding cache.
+
+    Args:
+        file_path: Path to the file to read
+
+    Returns:
+        Base64-encoded string of the file contents, or None if the file does not exist
+    """
+    try:
+        st = os.stat(file_path)
+        return b64_file(file_path, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return None
@@ -5,85 +5,128 @@ This script demonstrates a comprehensive Mailchimp Transactional (Mandrill)
 message exercising many available settings in one example.
 
 Usage:
-    python kitchen_sink_email.py
+    python kitchen_sink_email.py [--n N] [--concurrency C]
 
 Requirements:
     - mailchimp-transactional
     - python-dotenv
 """
 
+import argparse
 import os
-import base64
-from datetime import datetime, timedelta
-import mailchimp_transactional as MailchimpTransactional
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
 from mailchimp_transactional.api_client import ApiClientError
 from dotenv import load_dotenv
+from file_base64 import read_file_as_base64
+from mandrill_batcher import SENDER
+from mandrill_session import get_mailchimp_client
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the API client
-mailchimp = MailchimpTransactional.Client(os.getenv('MANDRILL_API_KEY'))
+# Environment snapshot taken once at import; the values don't change while the process runs
+_CFG = SimpleNamespace(
+    api_key=os.getenv('MANDRILL_API_KEY'),
+    from_email=os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+    from_name=os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
+    to_email=os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+    to_name=os.getenv('DEFAULT_TO_NAME', 'Test Recipient')
+)
+
+# Static sample attachment, resolved once at import
+_SAMPLE_PDF = os.path.join(os.path.dirname(__file__), 'sample.pdf')
+
+# Parts of the kitchen-sink message that are the same on every send, built once at import
+_KITCHEN_SINK_TEMPLATE = {
+    # Basic content
+    'html': '''
+        <h1>Hello {{fname}}!</h1>
+        <p>This email demonstrates multiple Transactional API features.</p>
+        <p><strong>Company:</strong> {{company_name}}</p>
+        <p><strong>Account:</strong> {{account_id}}</p>
+        <div style="width: 50px; height: 50px; background: #007bff; border: 2px solid #0056b3; display: inline-block;"></div>
+        <p>This is a comprehensive demonstration of the Mandrill API capabilities in Python.</p>
+    ''',
+    'text': '''Hello {{fname}}!
 
+This email demonstrates multiple Transactional API features.
+Company: {{company_name}}
+Account: {{account_id}}
 
-def read_file_as_base64(file_path):
-    """Helper to read a local file and return a Base64 string."""
-    try:
-        with open(file_path, 'rb') as file:
-            return base64.b64encode(file.read()).decode('utf-8')
-    except FileNotFoundError:
-        return None
+This is a comprehensive demonstration of the Mandrill API capabilities in Python.
+    ''',
 
+    # Basic fields
+    'subject': 'Hello {{fname}} - Mandrill Features Demo',
+    'from_email': _CFG.from_email,
+    'from_name': _CFG.from_name,
 
-def send_kitchen_sink():
+    # Headers
+    'headers': {
+        'Reply-To': _CFG.from_email,
+        'X-Custom-Header': 'Mandrill-Demo-Python'
+    },
+
+    # Merge variables
+    'global_merge_vars': (
+        {'name': 'company_name', 'content': 'Intuit Developer Program'},
+    ),
+    'merge_language': 'handlebars',
+
+    # Inline images (empty for this demo)
+    'images': [],
+
+    # Tracking
+    'track_opens': True,
+    'track_clicks': True,
+    'auto_text': True,
+    'auto_html': False,
+    'inline_css': True,
+
+    # Tags and metadata
+    'tags': ['demo', 'kitchen-sink', 'features', 'python'],
+    'metadata': {
+        'campaign': 'mandrill-demo',
+        'version': '2.0',
+        'language': 'python'
+    },
+
+    # Advanced options
+    'important': True,
+    'view_content_link': True,
+    'preserve_recipients': False,
+    'async': False
+}
+
+
+def _build_attachments():
     """
-    Send a comprehensive email demonstrating all major Mandrill features.
+    Attachments for the kitchen-sink message, as a tuple shared by all recipients.
+    File contents come from the encoding cache, so the PDF is only re-read when it changes.
     """
-    # Prepare attachments
-    attachments = []
-    sample_pdf_path = os.path.join(os.path.dirname(__file__), 'sample.pdf')
-    if os.path.exists(sample_pdf_path):
-        pdf_content = read_file_as_base64(sample_pdf_path)
-        if pdf_content:
-            attachments.append({
-                'type': 'application/pdf',
-                'name': 'sample.pdf',
-                'content': pdf_content
-            })
+    pdf_content = read_file_as_base64(_SAMPLE_PDF)
+    if not pdf_content:
+        return ()
+    return ({
+        'type': 'application/pdf',
+        'name': 'sample.pdf',
+        'content': pdf_content
+    },)
 
-    # Inline images (empty for this demo)
-    images = []
 
-    # Complete Mandrill message with ALL features
+def send_kitchen_sink():
+    """
+    Send a comprehensive email demonstrating all major Mandrill features.
+    """
+    # Static fields come from the prebuilt skeleton; only per-send fields are added here
     message = {
-        # Basic content
-        'html': '''
-            <h1>Hello {{fname}}!</h1>
-            <p>This email demonstrates multiple Transactional API features.</p>
-            <p><strong>Company:</strong> {{company_name}}</p>
-            <p><strong>Account:</strong> {{account_id}}</p>
-            <div style="width: 50px; height: 50px; background: #007bff; border: 2px solid #0056b3; display: inline-block;"></div>
-            <p>This is a comprehensive demonstration of the Mandrill API capabilities in Python.</p>
-        ''',
-        'text': '''Hello {{fname}}!
-
-This email demonstrates multiple Transactional API features.
-Company: {{company_name}}
-Account: {{account_id}}
-
-This is a comprehensive demonstration of the Mandrill API capabilities in Python.
-        ''',
-
-        # Basic fields
-        'subject': 'Hello {{fname}} - Mandrill Features Demo',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-        'from_name': os.getenv('DEFAULT_FROM_NAME', 'Test Sender'),
-
-        # All recipient types
+        **_KITCHEN_SINK_TEMPLATE,
         'to': [
             {
-                'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
-                'name': os.getenv('DEFAULT_TO_NAME', 'Test Recipient'),
+                'email': _CFG.to_email,
+                'name': _CFG.to_name,
                 'type': 'to'
             }
         ],
@@ -94,72 +137,35 @@ This is a comprehensive demonstration of the Mandrill API capabilities in Python
         # 'bcc': [
         #     {'email': 'bcc@example.com', 'name': 'BCC User', 'type': 'bcc'}
         # ],
-
-        # Headers
-        'headers': {
-            'Reply-To': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
-            'X-Custom-Header': 'Mandrill-Demo-Python'
-        },
-
-        # Merge variables
-        'global_merge_vars': [
-            {'name': 'company_name', 'content': 'Intuit Developer Program'}
-        ],
         'merge_vars': [
             {
-                'rcpt': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+                'rcpt': _CFG.to_email,
                 'vars': [
                     {'name': 'fname', 'content': 'John'},
                     {'name': 'account_id', 'content': 'ACC-001'}
                 ]
             }
         ],
-        'merge_language': 'handlebars',
-
-        # Attachments and images
-        'attachments': attachments,
-        'images': images,
-
-        # Tracking
-        'track_opens': True,
-        'track_clicks': True,
-        'auto_text': True,
-        'auto_html': False,
-        'inline_css': True,
-
-        # Tags and metadata
-        'tags': ['demo', 'kitchen-sink', 'features', 'python'],
-        'metadata': {
-            'campaign': 'mandrill-demo',
-            'version': '2.0',
-            'language': 'python'
-        },
-
-        # Advanced options
-        'important': True,
-        'view_content_link': True,
-        'preserve_recipients': False,
-        'async': False
+        # Encoded once per message, however many recipients it has
+        'attachments': list(_build_attachments())
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = SENDER.submit(message).result()
 
         print('Kitchen Sink email sent successfully!')
         print('=' * 70)
 
         if isinstance(result, list):
-            for r in result:
-                print(f"Recipient: {r['email']}")
-                print(f"  Status: {r['status']}")
-
-                if r.get('_id'):
-                    print(f"  Message ID: {r['_id']}")
-
-                if r.get('reject_reason'):
-                    print(f"  Reject Reason: {r['reject_reason']}")
-
-                print()
+            # One write for the whole batch rather than several prints per recipient
+            print(''.join(
+                f"Recipient: {r['email']}\n"
+                f"  Status: {r['status']}\n"
+                + (f"  Message ID: {r['_id']}\n" if r.get('_id') else '')
+                + (f"  Reject Reason: {r['reject_reason']}\n" if r.get('reject_reason') else '')
+                + '\n'
+                for r in result
+            ), end='')
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -179,18 +185,19 @@ def send_scheduled_kitchen_sink():
     Send a comprehensive email scheduled for future delivery.
     """
     # Schedule for 1 hour from now
-    send_at = (datetime.utcnow() + timedelta(hours=1)
-               ).strftime('%Y-%m-%d %H:%M:%S')
+    # (Mandrill expects 'YYYY-MM-DD HH:MM:SS' in UTC)
+    send_at = (datetime.now(timezone.utc) + timedelta(hours=1)
+               ).replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
 
     message = {
         'html': '<h1>Scheduled Email</h1><p>This was scheduled in advance, {{fname}}!</p>',
         'text': 'Scheduled Email\n\nThis was scheduled in advance, {{fname}}!',
         'subject': 'Scheduled: {{subject_line}}',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+        'from_email': _CFG.from_email,
         'from_name': 'Scheduled Sender',
         'to': [
             {
-                'email': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+                'email': _CFG.to_email,
                 'type': 'to'
             }
         ],
@@ -199,7 +206,7 @@ def send_scheduled_kitchen_sink():
         ],
         'merge_vars': [
             {
-                'rcpt': os.getenv('DEFAULT_TO_EMAIL', 'recipient@example.org'),
+                'rcpt': _CFG.to_email,
                 'vars': [
                     {'name': 'fname', 'content': 'Future Reader'}
                 ]
@@ -213,7 +220,7 @@ def send_scheduled_kitchen_sink():
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = get_mailchimp_client().messages.send({'message': message})
 
         print('Email scheduled successfully!')
         print('=' * 70)
@@ -221,8 +228,8 @@ def send_scheduled_kitchen_sink():
         print()
 
         if isinstance(result, list):
-            for r in result:
-                print(f"{r['email']}: {r['status']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(f"{r['email']}: {r['status']}" for r in result))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -241,7 +248,7 @@ def send_with_all_recipient_types():
     message = {
         'html': '<h1>Email with Multiple Recipient Types</h1><p>This demonstrates TO, CC, and BCC.</p>',
         'subject': 'Multiple Recipient Types Demo',
-        'from_email': os.getenv('DEFAULT_FROM_EMAIL', 'test@example.org'),
+        'from_email': _CFG.from_email,
         'from_name': 'Demo Sender',
         'to': [
             {'email': 'primary@example.org',
@@ -258,13 +265,13 @@ def send_with_all_recipient_types():
     }
 
     try:
-        result = mailchimp.messages.send({'message': message})
+        result = get_mailchimp_client().messages.send({'message': message})
 
         print('Email with multiple recipient types sent!')
 
         if isinstance(result, list):
-            for r in result:
-                print(f"  {r['email']}: {r['status']}")
+            # One write for the whole batch rather than one print per recipient
+            print('\n'.join(f"  {r['email']}: {r['status']}" for r in result))
         else:
             print(f'Unexpected result structure: {result}')
 
@@ -276,14 +283,23 @@ def send_with_all_recipient_types():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Send the kitchen sink demo email.')
+    parser.add_argument('--n', type=int, default=1, help='number of sends (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=4, help='sends in flight at once (default: 4)')
+    args = parser.parse_args()
+    if args.n < 1 or args.concurrency < 1:
+        parser.error('--n and --concurrency must be at least 1')
+
     # Check if API key is configured
-    if not os.getenv('MANDRILL_API_KEY'):
+    if not _CFG.api_key:
         print('Error: MANDRILL_API_KEY not found in environment variables!')
         print('Please create a .env file with your Mandrill API key.')
         exit(1)
 
     print('Sending comprehensive kitchen sink email...\n')
-    send_kitchen_sink()
+    # Sends go through the shared batcher; the attachments are encoded once and cached
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(lambda _: send_kitchen_sink(), range(args.n)))
 
     # Uncomment to test scheduled sending
     # print('\n\nScheduling kitchen sink email...\n')
@@ -0,0 +1,208 @@
+"""
+Batched sending for Mailchimp Transactional (Mandrill) messages.
+
+Technical Documentation:
+- Mandrill's messages.send accepts many recipients in one message, each with its own merge_vars and recipient_metadata.
+- MandrillSender runs a background worker that drains a bounded queue in small batches (up to MAX_BATCH
+  messages, or whatever arrived within FLUSH_INTERVAL seconds).
+- Messages in a batch that differ only in their recipients are grouped and each group is sent as one API call;
+  a recipient is never in the same call twice, so each result maps back to exactly one message.
+- Groups are sent in parallel on a small pool of SEND_WORKERS threads.
+- Coalesced messages are sent with preserve_recipients off, so recipients never see each other's addresses.
+
+User Documentation:
+- Call SENDER.submit(message) with a message dict (the value you would send as 'message').
+- The returned Future resolves to the list of Mandrill send results for that message's own recipients.
+"""
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from mandrill_session import get_mailchimp_client
+
+# Batching limits for MandrillSender: most messages per API call, and how long to wait for more to arrive
+MAX_BATCH = 50
+FLUSH_INTERVAL = 0.02
+
+# Groups from one batch sent at the same time; sends to the same recipient never merge, so they need this
+SEND_WORKERS = 4
+
+# Message keys that are merged across a batch; every other key must match for messages to share a call
+_RECIPIENT_KEYS = ('to', 'merge_vars', 'recipient_metadata')
+
+# Base64 payload keys; their content strings are compared by identity, never serialized for the key
+_PAYLOAD_KEYS = ('attachments', 'images')
+
+
+def _content_key(index, message):
+    """
+    Grouping key for a message: its content without the recipient-specific keys.
+    """
+    # A message that asks to show all recipients in the To: header is never combined with others
+    if message.get('preserve_recipients'):
+        return index
+    content = {k: v for k, v in message.items() if k not in _RECIPIENT_KEYS and k not in _PAYLOAD_KEYS}
+    # Encoded content comes from the per-file Base64 cache, so the same file version is the same
+    # string object in every message; messages in one batch are all alive, so equal ids mean equal content
+    payloads = tuple(
+        (k, tuple((item.get('type'), item.get('name'), id(item.get('content'))) for item in message[k]))
+        for k in _PAYLOAD_KEYS if k in message
+    )
+    return json.dumps(content, sort_keys=True, default=str), payloads
+
+
+def _merge(messages):
+    """
+    Combine messages with identical content into one message carrying all their recipients.
+    """
+    if len(messages) == 1:
+        return messages[0]
+    merged = {k: v for k, v in messages[0].items() if k not in _RECIPIENT_KEYS}
+    for key in _RECIPIENT_KEYS:
+        values = [item for message in messages for item in message.get(key, ())]
+        if values:
+            merged[key] = values
+    merged['preserve_recipients'] = False
+    return merged
+
+
+def _groups(messages):
+    """
+    Split message indexes into groups that can each be sent as one merged message.
+
+    Messages share a group when their content matches and none of their recipients is already
+    in it, so every recipient appears at most once per API call and its result and merge_vars
+    belong to exactly one message.
+    """
+    groups = {}
+    for index, message in enumerate(messages):
+        emails = {rcpt['email'].lower() for rcpt in message.get('to', ())}
+        candidates = groups.setdefault(_content_key(index, message), [])
+        for indexes, seen in candidates:
+            if not emails & seen:
+                indexes.append(index)
+                seen.update(emails)
+                break
+        else:
+            candidates.append(([index], emails))
+    return [indexes for candidates in groups.values() for indexes, _ in candidates]
+
+
+def _send_group(client, messages, indexes):
+    """
+    Send one group of messages as a single messages.send call.
+
+    Returns:
+        List aligned with indexes, each entry the send results for that message's recipients
+    """
+    response = client.messages.send({'message': _merge([messages[i] for i in indexes])})
+
+    # Route the per-recipient results back to the message each recipient came from
+    by_email = {}
+    for result in response:
+        by_email.setdefault(result['email'].lower(), []).append(result)
+    return [
+        [
+            result
+            for rcpt in messages[i].get('to', ())
+            for result in by_email.get(rcpt['email'].lower(), ())
+        ]
+        for i in indexes
+    ]
+
+
+class MandrillSender:
+    """
+    Background sender that batches submitted messages into shared API calls.
+    """
+
+    def __init__(self, client=None, max_batch=MAX_BATCH, flush_interval=FLUSH_INTERVAL, max_queued=1000,
+                 send_workers=SEND_WORKERS):
+        self._client = client
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._pool = ThreadPoolExecutor(max_workers=send_workers, thread_name_prefix='mandrill-batcher-send')
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, message):
+        """
+        Queue a message for sending.
+
+        Args:
+            message: Mandrill message dict
+
+        Returns:
+            Future resolving to the send results for the message's recipients,
+            or raising the ApiClientError from Mandrill
+
+        Raises:
+            ValueError: If a recipient has no 'email'; checked here so one bad message
+                never fails the others batched with it
+        """
+        for rcpt in message.get('to', ()):
+            if not isinstance(rcpt.get('email'), str):
+                raise ValueError(f"Recipient has no 'email': {rcpt!r}")
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='mandrill-batcher', daemon=True)
+                    self._worker.start()
+        future = Future()
+        self._queue.put((message, future))
+        return future
+
+    def _drain(self):
+        """
+        Block for one queued item, then collect more until the batch is full or the flush interval ends.
+        """
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self._flush_interval
+        while len(items) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = [(message, future) for message, future in self._drain() if future.set_running_or_notify_cancel()]
+            if not items:
+                continue
+            try:
+                client = self._client or get_mailchimp_client()
+            except Exception as error:
+                for _, future in items:
+                    future.set_exception(error)
+                continue
+
+            messages = [message for message, _ in items]
+            for indexes in _groups(messages):
+                self._pool.submit(self._send, client, messages, [items[i][1] for i in indexes], indexes)
+
+    @staticmethod
+    def _send(client, messages, futures, indexes):
+        """
+        Send one group and settle its futures.
+
+        Each group is settled on its own, so a failed call never reports
+        an error for messages another call already delivered.
+        """
+        try:
+            results = _send_group(client, messages, indexes)
+        except Exception as error:
+            for future in futures:
+                future.set_exception(error)
+        else:
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+
+# Process-wide sender; its worker thread starts on the first submit()
+SENDER = MandrillSender()
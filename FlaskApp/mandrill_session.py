@@ -0,0 +1,146 @@
+"""
+Shared HTTP session for Mailchimp Transactional (Mandrill) API clients.
+
+Technical Documentation:
+- The mailchimp_transactional SDK sends every API call with a bare requests.post(), which opens a new TCP/TLS connection each time.
+- configure_client() routes a client's calls through one process-wide requests.Session, so connections to mandrillapp.com are kept alive and reused.
+- The CA bundle is loaded into one SSLContext at import and reused for every verified connection,
+  instead of being parsed again each time a new connection is opened.
+- Request bodies are serialized, and JSON responses parsed, with orjson when available, falling back to the stdlib json module.
+- get_mailchimp_client() builds one configured client per process on first use, so scripts share it instead of creating their own.
+
+User Documentation:
+- Pass a newly created client through configure_client(); the client is used exactly as before.
+- Or call get_mailchimp_client() after load_dotenv() to get the shared client for MANDRILL_API_KEY.
+"""
+import os
+import random
+import ssl
+import threading
+import requests
+import mailchimp_transactional as MailchimpTransactional
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.util.retry import Retry
+
+# Serialize request bodies and parse responses with orjson when it is installed;
+# it handles large base64 attachments and long result lists much faster
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    from json import dumps as _json_dumps, loads as _json_loads
+
+
+class JitteredRetry(Retry):
+    """
+    Retry with "full jitter": each backoff sleeps a random time up to the exponential delay,
+    so clients that were rate-limited together don't retry in lockstep.
+    """
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff else 0
+
+
+# Retry policy for API calls: failures to connect, plus responses where Mandrill
+# refused the request without processing it (429 rate limit, 503 unavailable),
+# waiting as long as the Retry-After header asks and otherwise backing off
+# exponentially with jitter. Read errors (timeouts, connections dropped after the
+# body was sent) and other 5xx responses are never retried, because the POST may
+# already have been delivered and Mandrill has no idempotency key to make a resend
+# safe. After the last attempt the response is handed back to the SDK, which
+# raises ApiClientError as usual.
+RETRY = JitteredRetry(
+    total=5,
+    read=0,
+    other=0,
+    backoff_factor=0.5,
+    status_forcelist=[429, 503],
+    allowed_methods=frozenset({'POST'}),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+
+# TLS context for verified connections, built once; urllib3 otherwise creates a context
+# and parses the whole CA bundle for every new connection
+_SSL_CONTEXT = ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+
+
+class CachedTLSAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that opens verified connections with the shared _SSL_CONTEXT.
+    Requests made with verify=False or a custom CA bundle keep requests' default handling,
+    so the shared context is never switched to a weaker mode.
+    """
+
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+        if verify is True:
+            conn.conn_kw['ssl_context'] = _SSL_CONTEXT
+            # The bundle is already loaded into the context; don't have urllib3 load it again
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+        else:
+            conn.conn_kw.pop('ssl_context', None)
+
+
+# One pooled, keep-alive session shared by every client and any other outbound call in the process.
+# Each in-flight HTTP/1.1 request holds its own connection, so the pool is sized above the largest
+# thread fan-out; with pool_block a burst beyond that waits for a warm connection instead of opening
+# an extra TLS connection that would be discarded afterwards.
+SESSION = requests.Session()
+SESSION.mount('https://', CachedTLSAdapter(
+    pool_connections=8,
+    pool_maxsize=20,
+    pool_block=True,
+    max_retries=RETRY
+))
+
+
+def configure_client(client):
+    """
+    Route a Mailchimp Transactional client's API calls through the shared session.
+
+    Args:
+        client: A MailchimpTransactional.Client instance
+
+    Returns:
+        The same client, for chaining
+    """
+    api_client = client.api_client
+
+    def request(method, url, body=None, headers=None, timeout=None):
+        if method != 'POST':
+            raise ValueError("http method must be `POST`")
+        response = SESSION.post(url, data=_json_dumps(body), headers=headers, timeout=timeout or api_client.timeout)
+        # The SDK parses the body with response.json(); route that through the faster parser too
+        response.json = lambda **kwargs: _json_loads(response.content)
+        return response
+
+    api_client.request = request
+    return client
+
+
+# Process-wide client, created lazily by get_mailchimp_client()
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_mailchimp_client():
+    """
+    Get the shared Mailchimp Transactional client, creating it on first use.
+
+    The API key is read on the first call, so callers load their .env file before using it.
+
+    Returns:
+        A MailchimpTransactional.Client routed through the shared session
+    """
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                api_key = os.getenv('MANDRILL_API_KEY')
+                if not api_key:
+                    raise ValueError("MANDRILL_API_KEY not found in environment variables")
+                _CLIENT = configure_client(MailchimpTransactional.Client(api_key))
+    return _CLIENT
@@ -11,9 +11,11 @@ Usage:
 Requirements:
     - requests
     - python-dotenv
+    - mailchimp-transactional (imported by mandrill_session, whose pooled
+      HTTP session this script shares)
 
 Install with:
-    pip install requests python-dotenv
+    pip install requests python-dotenv mailchimp-transactional
     
 Or with requirements.txt:
     pip install -r requirements.txt
@@ -22,11 +24,37 @@ Note: SMS functionality uses the Mandrill REST API v1.1 directly since the
 Python SDK doesn't include the send_sms method yet.
 """
 
+import hashlib
+import importlib.util
 import os
+import re
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 import json
-import requests
 import ssl
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException, SSLError, Timeout
+from urllib3.exceptions import InsecureRequestWarning
 from dotenv import load_dotenv
+from mandrill_session import RETRY, SESSION
+
+# Serialize payloads and parse responses with orjson when it is installed
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    from json import dumps as _json_dumps, loads as _json_loads
+
+# HTTP/2 client for send_sms_http2 when httpx and its h2 extra are installed
+try:
+    import httpx
+except ImportError:
+    httpx = None
+if importlib.util.find_spec('h2') is None:
+    httpx = None
 
 # Load environment variables
 load_dotenv()
@@ -34,11 +62,105 @@ load_dotenv()
 # SMS API endpoint (note: uses API version 1.1, not 1.0)
 SMS_API_ENDPOINT = 'https://mandrillapp.com/api/1.1/messages/send-sms'
 
+# Request headers, built once rather than per call
+_HEADERS = {'Content-Type': 'application/json'}
+
+# Recipient numbers must be E.164: '+', a non-zero country code digit, 7 to 15 digits in all
+_E164 = re.compile(r'\+[1-9]\d{6,14}')
+
+# Fields read from a send-sms response body by the parse='minimal' fast path
+_ID_RE = re.compile(rb'"_id"\s*:\s*"([^"]*)"')
+_STATUS_RE = re.compile(rb'"status"\s*:\s*"([^"]*)"')
+_REJECT_RE = re.compile(rb'"reject_reason"\s*:\s*"([^"]*)"')
+
+# Response fields shown by send_sms, as (label, key) pairs
+_DETAIL_FIELDS = (
+    ('Status', 'status'),
+    ('To', 'to'),
+    ('Message ID', '_id'),
+    ('Reject Reason', 'reject_reason')
+)
+
+# Separator line around printed send results
+BANNER = '=' * 50
+
 # SSL verification mode - set SSL_VERIFY=false if behind corporate proxy
 SSL_VERIFY = os.getenv('SSL_VERIFY', 'true').lower() != 'false'
 
+# Environment snapshot taken once at import; the values don't change while the process runs
+_CFG = SimpleNamespace(
+    api_key=os.getenv('MANDRILL_API_KEY'),
+    to_phone=os.getenv('SMS_TO_PHONE', '+1234567890'),
+    from_phone=os.getenv('SMS_FROM_PHONE', '+0987654321'),
+    message=os.getenv('SMS_MESSAGE', 'Hello from Mandrill SMS! This is a test message.'),
+    consent_type=os.getenv('SMS_CONSENT_TYPE', 'onetime'),
+    track_clicks=os.getenv('SMS_TRACK_CLICKS', 'false').lower() == 'true',
+    verbose=os.getenv('SMS_VERBOSE', 'true').lower() != 'false'
+)
+
+# Session for SMS calls: the shared keep-alive session, unless verification is off.
+# Unverified connections get a private session so they never return to the pool the
+# email clients reuse. With verification off, warn once here rather than on every send,
+# and silence urllib3's per-request InsecureRequestWarning for the SMS host only.
+if SSL_VERIFY:
+    _SMS_SESSION = SESSION
+else:
+    _SMS_SESSION = requests.Session()
+    _SMS_SESSION.verify = False
+    _SMS_SESSION.mount('https://', HTTPAdapter(pool_maxsize=20, max_retries=RETRY))
+    warnings.filterwarnings(
+        'ignore',
+        message=r"Unverified HTTPS request is being made to host 'mandrillapp\.com'",
+        category=InsecureRequestWarning
+    )
+    if _CFG.verbose:
+        print("⚠️  SSL verification disabled (SSL_VERIFY=false)")
+
+
+def _build_payload(to=None, from_phone=None, text=None, consent=None, track_clicks=None):
+    """
+    Build the send-sms request body, filling unset fields from the environment defaults.
+    """
+    return {
+        'key': _CFG.api_key,
+        'message': {
+            'sms': {
+                'text': text or _CFG.message,
+                'to': to or _CFG.to_phone,
+                'from': from_phone or _CFG.from_phone,
+                'consent': consent or _CFG.consent_type,
+                'track_clicks': track_clicks if track_clicks is not None else _CFG.track_clicks
+            }
+        }
+    }
+
+
+# Recent successful sends for idempotent=True calls, keyed by a hash of (to, from, text): {key: (sent_at, result)}
+_RECENT = {}
+_RECENT_TTL = 60.0
+_SENT_STATUSES = frozenset({'sent', 'queued', 'scheduled'})
+
+
+def _sms_key(sms):
+    """
+    Return a short BLAKE2b digest identifying an SMS by recipient, sender and text.
+    """
+    return hashlib.blake2b(f"{sms['to']}|{sms['from']}|{sms['text']}".encode('utf-8'), digest_size=16).digest()
+
+
+def _remember(key, result, now):
+    """
+    Cache a send result under key if every recipient was accepted, dropping expired entries.
+    """
+    results = result if isinstance(result, list) else [result]
+    if results and all(isinstance(r, dict) and r.get('status') in _SENT_STATUSES for r in results):
+        for k, (sent_at, _) in list(_RECENT.items()):
+            if now - sent_at >= _RECENT_TTL:
+                _RECENT.pop(k, None)
+        _RECENT[key] = (now, result)
 
-def send_sms(to=None, from_phone=None, text=None, consent=None, track_clicks=None):
+
+def send_sms(to=None, from_phone=None, text=None, consent=None, track_clicks=None, verbose=None, idempotent=False):
     """
     Send an SMS message using the Mandrill API.
     
@@ -48,82 +170,82 @@ def send_sms(to=None, from_phone=None, text=None, consent=None, track_clicks=Non
         text (str): SMS message content (max 1600 characters)
         consent (str): Consent type ('onetime', 'recurring', 'recurring-no-confirm')
         track_clicks (bool): Whether to track link clicks in the message
+        verbose (bool): Print the request outcome and response; defaults to SMS_VERBOSE
+        idempotent (bool): Return the earlier result instead of sending again if the same
+            to/from/text was sent successfully in the last _RECENT_TTL seconds
     
     Returns:
         dict or None: API response on success, None on failure
     """
-    api_key = os.getenv('MANDRILL_API_KEY')
+    if verbose is None:
+        verbose = _CFG.verbose
+    
+    api_key = _CFG.api_key
     
     if not api_key:
-        print('Error: MANDRILL_API_KEY not found in environment variables!')
-        print('Please create a .env file with your Mandrill API key.')
+        if verbose:
+            print('Error: MANDRILL_API_KEY not found in environment variables!')
+            print('Please create a .env file with your Mandrill API key.')
         return None
     
     # Build the SMS message payload with defaults from environment
-    to_phone = to or os.getenv('SMS_TO_PHONE', '+1234567890')
-    sender_phone = from_phone or os.getenv('SMS_FROM_PHONE', '+0987654321')
-    message_text = text or os.getenv('SMS_MESSAGE', 'Hello from Mandrill SMS! This is a test message.')
-    consent_type = consent or os.getenv('SMS_CONSENT_TYPE', 'onetime')
-    should_track_clicks = track_clicks if track_clicks is not None else os.getenv('SMS_TRACK_CLICKS', 'false').lower() == 'true'
-    
-    payload = {
-        'key': api_key,
-        'message': {
-            'sms': {
-                'text': message_text,
-                'to': to_phone,
-                'from': sender_phone,
-                'consent': consent_type,
-                'track_clicks': should_track_clicks
-            }
-        }
-    }
+    payload = _build_payload(to, from_phone, text, consent, track_clicks)
+    
+    to_phone = payload['message']['sms']['to']
+    if not _E164.fullmatch(to_phone):
+        if verbose:
+            print(f'Error: {to_phone!r} is not an E.164 phone number (e.g., +1234567890)')
+        return None
+    
+    key = None
+    if idempotent:
+        key = _sms_key(payload['message']['sms'])
+        cached = _RECENT.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _RECENT_TTL:
+            if verbose:
+                print('Identical SMS already sent; reusing its result')
+            return cached[1]
     
     try:
-        # Set up the request
-        headers = {'Content-Type': 'application/json'}
-        
-        if not SSL_VERIFY:
-            print("⚠️  SSL verification disabled (SSL_VERIFY=false)")
-        
-        # Send the request
-        response = requests.post(
+        # Send the request over the keep-alive SMS session
+        response = _SMS_SESSION.post(
             SMS_API_ENDPOINT,
-            headers=headers,
-            json=payload,
-            timeout=30,
-            verify=SSL_VERIFY
+            headers=_HEADERS,
+            data=_json_dumps(payload),
+            timeout=30
         )
         
-        print('SMS Request sent!')
-        print('=' * 50)
+        if verbose:
+            print('SMS Request sent!')
+            print(BANNER)
         
         if response.status_code == 200:
-            result = response.json()
+            result = _json_loads(response.content)
+            if key is not None:
+                _remember(key, result, time.monotonic())
+            if not verbose:
+                return result
+            
             print('SMS sent successfully!')
             print(f'Response: {json.dumps(result, indent=2)}')
             
-            # Display key details from the response
-            if isinstance(result, list) and len(result) > 0:
-                first_result = result[0]
-                print('\nDetails:')
-                if first_result.get('status'):
-                    print(f"  Status: {first_result['status']}")
-                if first_result.get('to'):
-                    print(f"  To: {first_result['to']}")
-                if first_result.get('_id'):
-                    print(f"  Message ID: {first_result['_id']}")
-                if first_result.get('reject_reason'):
-                    print(f"  Reject Reason: {first_result['reject_reason']}")
-            elif isinstance(result, dict):
-                if result.get('status'):
-                    print(f"  Status: {result['status']}")
-                if result.get('_id'):
-                    print(f"  Message ID: {result['_id']}")
+            # Display key details from the first (or only) result
+            if isinstance(result, list):
+                first_result = result[0] if result else {}
+            else:
+                first_result = result if isinstance(result, dict) else {}
+            details = [
+                f'  {label}: {first_result[field]}'
+                for label, field in _DETAIL_FIELDS
+                if first_result.get(field)
+            ]
+            # One write for the details block rather than one print per field
+            if details:
+                print('\nDetails:\n' + '\n'.join(details))
             
-            print('=' * 50)
+            print(BANNER)
             return result
-        else:
+        elif verbose:
             try:
                 error_body = response.json()
             except:
@@ -135,29 +257,32 @@ def send_sms(to=None, from_phone=None, text=None, consent=None, track_clicks=Non
                 print(f'Error: {json.dumps(error_body, indent=2)}')
             else:
                 print(f'Error: {error_body}')
-            print('=' * 50)
-            return None
+            print(BANNER)
+        return None
             
-    except requests.exceptions.SSLError as e:
-        print('SSL Certificate Error!')
-        print('=' * 50)
-        print(f'Error: {e}')
-        print('')
-        print("💡 TIP: If you're behind a corporate proxy, add this to your .env file:")
-        print("   SSL_VERIFY=false")
-        print('=' * 50)
+    except SSLError as e:
+        if verbose:
+            print('SSL Certificate Error!')
+            print(BANNER)
+            print(f'Error: {e}')
+            print('')
+            print("💡 TIP: If you're behind a corporate proxy, add this to your .env file:")
+            print("   SSL_VERIFY=false")
+            print(BANNER)
         return None
-    except requests.exceptions.Timeout:
-        print('Request Timeout!')
-        print('=' * 50)
-        print('The request timed out after 30 seconds.')
-        print('=' * 50)
+    except Timeout:
+        if verbose:
+            print('Request Timeout!')
+            print(BANNER)
+            print('The request timed out after 30 seconds.')
+            print(BANNER)
         return None
     except Exception as e:
-        print('Error sending SMS!')
-        print('=' * 50)
-        print(f'Error: {e}')
-        print('=' * 50)
+        if verbose:
+            print('Error sending SMS!')
+            print(BANNER)
+            print(f'Error: {e}')
+            print(BANNER)
         return None
 
 
@@ -174,11 +299,15 @@ def send_sms_with_error_handling(to_phone, from_phone, message_text, consent_typ
     Returns:
         dict: Result with 'success' boolean and 'data' or 'error' key
     """
+    if to_phone and not _E164.fullmatch(to_phone):
+        return {'success': False, 'error': f'Invalid phone number: {to_phone}'}
+    
     result = send_sms(
         to=to_phone,
         from_phone=from_phone,
         text=message_text,
-        consent=consent_type
+        consent=consent_type,
+        verbose=False
     )
     
     if result:
@@ -190,10 +319,148 @@ def send_sms_with_error_handling(to_phone, from_phone, message_text, consent_typ
     return {'success': False, 'error': 'Failed to send SMS'}
 
 
+def _summarize(result):
+    """
+    Reduce a decoded send-sms response to the first result's _id, status and reject_reason.
+    """
+    first_result = result[0] if isinstance(result, list) and result else result
+    if not isinstance(first_result, dict):
+        return None
+    summary = {'_id': first_result.get('_id'), 'status': first_result.get('status')}
+    if first_result.get('reject_reason'):
+        summary['reject_reason'] = first_result['reject_reason']
+    return summary
+
+
+def _parse_response(content, parse):
+    """
+    Parse a successful send-sms response body.
+    
+    parse='full' returns the decoded JSON. parse='minimal' returns just the first result's
+    _id, status and (if set) reject_reason. When that first result is a flat object with both
+    _id and status, they are read straight from its bytes; otherwise the body is decoded.
+    """
+    if parse != 'minimal':
+        return _json_loads(content)
+    # Scan only the first object, and only when nothing nested could hide its fields
+    start = content.find(b'{')
+    end = content.find(b'}', start + 1) if start >= 0 else -1
+    if end >= 0 and b'{' not in content[start + 1:end]:
+        first = content[start:end]
+        match = _ID_RE.search(first)
+        status = _STATUS_RE.search(first)
+        if match is not None and status is not None:
+            summary = {'_id': match.group(1).decode('utf-8'), 'status': status.group(1).decode('utf-8')}
+            reason = _REJECT_RE.search(first)
+            if reason is not None:
+                summary['reject_reason'] = reason.group(1).decode('utf-8')
+            return summary
+    return _summarize(_json_loads(content))
+
+
+def send_sms_many(messages, concurrency=20, parse='full'):
+    """
+    Send many SMS messages concurrently over the keep-alive SMS session.
+    
+    Args:
+        messages (list): Dicts of send_sms keyword arguments (to, from_phone, text, consent, track_clicks)
+        concurrency (int): Maximum number of requests in flight at once
+        parse (str): 'full' for the decoded API response, or 'minimal' for just the first
+            result's '_id', 'status' and 'reject_reason', read without decoding the whole body
+    
+    Returns:
+        list: Parsed API response for each message, in the same order; None where a send failed
+            or the recipient is not an E.164 number
+    """
+    if not _CFG.api_key:
+        print('Error: MANDRILL_API_KEY not found in environment variables!')
+        return [None] * len(messages)
+    
+    def send_one(message):
+        payload = _build_payload(**message)
+        if not _E164.fullmatch(payload['message']['sms']['to']):
+            return None
+        try:
+            response = _SMS_SESSION.post(
+                SMS_API_ENDPOINT,
+                headers=_HEADERS,
+                data=_json_dumps(payload),
+                timeout=30
+            )
+            return _parse_response(response.content, parse) if response.status_code == 200 else None
+        except (RequestException, ValueError):
+            return None
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(send_one, messages))
+
+
+# Process-wide HTTP/2 client, created lazily by _http2_client()
+_HTTP2_CLIENT = None
+_HTTP2_LOCK = threading.Lock()
+
+
+def _http2_client():
+    """
+    Get the shared httpx HTTP/2 client, creating it on first use.
+    """
+    global _HTTP2_CLIENT
+    if _HTTP2_CLIENT is None:
+        with _HTTP2_LOCK:
+            if _HTTP2_CLIENT is None:
+                _HTTP2_CLIENT = httpx.Client(
+                    http2=True,
+                    headers=_HEADERS,
+                    limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+                    timeout=30.0,
+                    verify=SSL_VERIFY
+                )
+    return _HTTP2_CLIENT
+
+
+def send_sms_http2(messages, concurrency=20, parse='full'):
+    """
+    Send many SMS messages concurrently, multiplexed as HTTP/2 streams over a few connections.
+    
+    Falls back to send_sms_many() when httpx[http2] is not installed. If the server
+    doesn't negotiate HTTP/2, httpx uses HTTP/1.1 on up to four connections.
+    
+    Args:
+        messages (list): Dicts of send_sms keyword arguments (to, from_phone, text, consent, track_clicks)
+        concurrency (int): Maximum number of requests in flight at once
+        parse (str): 'full' for the decoded API response, or 'minimal' for just the first
+            result's '_id', 'status' and 'reject_reason', read without decoding the whole body
+    
+    Returns:
+        list: Parsed API response for each message, in the same order; None where a send failed
+            or the recipient is not an E.164 number
+    """
+    if httpx is None:
+        return send_sms_many(messages, concurrency, parse)
+    
+    if not _CFG.api_key:
+        print('Error: MANDRILL_API_KEY not found in environment variables!')
+        return [None] * len(messages)
+    
+    client = _http2_client()
+    
+    def send_one(message):
+        payload = _build_payload(**message)
+        if not _E164.fullmatch(payload['message']['sms']['to']):
+            return None
+        try:
+            response = client.post(SMS_API_ENDPOINT, content=_json_dumps(payload))
+            return _parse_response(response.content, parse) if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError):
+            return None
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(send_one, messages))
+
 # Main execution
 if __name__ == '__main__':
     # Check if API key is configured
-    if not os.getenv('MANDRILL_API_KEY'):
+    if not _CFG.api_key:
         print('Error: MANDRILL_API_KEY not found in environment variables!')
         print('Please create a .env file with your Mandrill API key.')
         exit(1)
@@ -205,13 +472,8 @@ if __name__ == '__main__':
     custom_message = os.getenv('SMS_CUSTOM_MESSAGE')
     custom_to = os.getenv('SMS_CUSTOM_TO')
     
-    if custom_message or custom_to:
-        result = send_sms(
-            to=custom_to or os.getenv('SMS_TO_PHONE'),
-            text=custom_message or os.getenv('SMS_MESSAGE')
-        )
-    else:
-        result = send_sms()
+    # Unset values fall back to the SMS_* defaults captured in _CFG at import
+    result = send_sms(to=custom_to, text=custom_message)
     
     if result:
         print('\n✅ SMS operation completed!')